@@ -0,0 +1,215 @@
+"""
+Page size and concurrency autotuning for paginated order crawls.
+
+Every paginated fetch (one account, shop or backfill chunk) is an episode run
+with the tuner's current page size and number of in-flight requests. After
+each episode the tuner compares its throughput (orders/sec) with the best seen
+so far and hill-climbs one setting at a time within the crawler's bounds:
+a step that helps is kept and repeated, one that doesn't is undone and the
+next setting or direction is tried. An episode with throttled (429) requests,
+or one failing with more than FAILING_ERROR_RATE of its requests erroring,
+halves the concurrency straight away; a concurrency that got throttled is not tried
+again until CEILING_RELAX_EPISODES episodes have passed without throttling.
+
+Learned settings are kept per platform and per 6-hour slot of the day, since
+API latency and rate-limit headroom vary over the day, and persisted to
+AUTOTUNE_STATE (default ./data/autotune.json) as the starting point of the
+next run.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from storage.files import atomic_write, file_lock
+
+logger = logging.getLogger("pod_crawler.autotune")
+
+DEFAULT_STATE_PATH = "./data/autotune.json"
+
+# A step must beat the best throughput by this much to count as an improvement
+IMPROVEMENT = 1.05
+# The best throughput slowly decays, so settings are re-explored as conditions change
+BEST_DECAY = 0.98
+PAGE_SIZE_FACTOR = 1.5
+# Share of an episode's requests that may fail (5xx, connection errors) before it counts as failing
+FAILING_ERROR_RATE = 0.2
+# Episodes without throttling after which the concurrency ceiling is raised by one again
+CEILING_RELAX_EPISODES = 20
+
+
+def _time_slot(now: Optional[datetime] = None) -> str:
+    hour = (now or datetime.now()).hour
+    return f"{hour - hour % 6:02d}"
+
+
+class Episode:
+    """
+    One paginated fetch: the settings it runs with and what its requests ran into.
+    Episodes of accounts crawled at the same time share a tuner but not these counts.
+    """
+
+    def __init__(self, page_size: int, concurrency: int):
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    @property
+    def settings(self) -> Tuple[int, int]:
+        return self.page_size, self.concurrency
+
+
+class Autotuner:
+    def __init__(self, platform: str, path: str, default_page_size: int,
+                 page_size_bounds: Tuple[int, int], concurrency_bounds: Tuple[int, int]):
+        self.platform = platform
+        self.path = path
+        self.default_page_size = default_page_size
+        self.page_size_bounds = page_size_bounds
+        self.concurrency_bounds = concurrency_bounds
+        self._lock = threading.Lock()
+        self._states: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get(self.platform, {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _state(self, slot: str) -> dict:
+        state = self._states.get(slot)
+        if state is None:
+            # Start a new slot from the most recently tuned one, or from the crawler defaults
+            latest = max(self._states.values(), key=lambda s: s.get("updated_at", ""), default=None)
+            state = self._states[slot] = {
+                "page_size": latest["page_size"] if latest else self.default_page_size,
+                "concurrency": latest["concurrency"] if latest else self.concurrency_bounds[0],
+                "best": None, "best_settings": None,
+                "dimension": "concurrency", "direction": 1,
+                "episodes": 0,
+                "ceiling": None, "ceiling_at": 0,
+            }
+        state["page_size"] = self._clamp(state["page_size"], self.page_size_bounds)
+        state["concurrency"] = self._clamp(state["concurrency"], self.concurrency_bounds)
+        return state
+
+    @staticmethod
+    def _clamp(value: int, bounds: Tuple[int, int]) -> int:
+        return max(bounds[0], min(bounds[1], int(value)))
+
+    def start(self) -> Episode:
+        """Begin an episode with the current (page size, concurrency)"""
+        with self._lock:
+            state = self._state(_time_slot())
+            return Episode(state["page_size"], state["concurrency"])
+
+    def observe(self, episode: Episode, throttled: bool = False, error: bool = False):
+        """Record one request of `episode`; its pages are fetched from several threads"""
+        with self._lock:
+            episode.requests += 1
+            episode.throttled += throttled
+            episode.errors += error
+
+    def finish(self, episode: Episode, orders: int, pages: int, seconds: float):
+        """
+        Record the outcome of `episode` and choose the next settings. Also called for
+        episodes that ended with an error, so failing requests back off too.
+        """
+        with self._lock:
+            state = self._state(_time_slot())
+            settings = episode.settings
+            throttled, errors = episode.throttled, episode.errors
+            failing = episode.requests and errors / episode.requests > FAILING_ERROR_RATE
+            state["episodes"] += 1
+
+            if throttled or failing:
+                # Back off hard, and don't climb back to the level that was throttled for a while
+                if throttled:
+                    state["ceiling"] = max(self.concurrency_bounds[0], settings[1] - 1)
+                    state["ceiling_at"] = state["episodes"]
+                state["concurrency"] = self._clamp(state["concurrency"] // 2, self.concurrency_bounds)
+                state["best"], state["best_settings"] = None, None
+                state["dimension"], state["direction"] = "concurrency", 1
+                logger.info("%s: %s throttled / %s failed requests, concurrency down to %s",
+                            self.platform, throttled, errors, state["concurrency"])
+            else:
+                if state.get("ceiling") is not None and \
+                        state["episodes"] - state.get("ceiling_at", 0) >= CEILING_RELAX_EPISODES:
+                    state["ceiling"] += 1
+                    state["ceiling_at"] = state["episodes"]
+                    if state["ceiling"] >= self.concurrency_bounds[1]:
+                        state["ceiling"] = None
+                if pages >= 2 and seconds > 0 and list(settings) == [state["page_size"], state["concurrency"]]:
+                    # Single-page episodes say nothing about the settings, nor do episodes
+                    # that started before the last change
+                    self._climb(state, orders / seconds)
+            state["updated_at"] = datetime.now().isoformat()
+            self._save()
+
+    def _climb(self, state: dict, throughput: float):
+        if state["best"] is not None:
+            state["best"] *= BEST_DECAY
+        if state["best"] is None or throughput > state["best"] * IMPROVEMENT:
+            state["best"] = throughput
+            state["best_settings"] = [state["page_size"], state["concurrency"]]
+        else:
+            # No better than the best settings: go back to them and try the other way
+            state["page_size"], state["concurrency"] = state["best_settings"]
+            if state["direction"] > 0:
+                state["direction"] = -1
+            else:
+                state["direction"] = 1
+                state["dimension"] = "page_size" if state["dimension"] == "concurrency" else "concurrency"
+
+        for _ in range(4):
+            if self._step(state):
+                return
+            # Already at a bound in this direction; try the next direction/setting
+            state["direction"] = -state["direction"]
+            if state["direction"] > 0:
+                state["dimension"] = "page_size" if state["dimension"] == "concurrency" else "concurrency"
+
+    def _step(self, state: dict) -> bool:
+        if state["dimension"] == "concurrency":
+            low, high = self.concurrency_bounds
+            if state.get("ceiling") is not None:
+                high = min(high, state["ceiling"])
+            value = self._clamp(state["concurrency"] + state["direction"], (low, high))
+            changed, state["concurrency"] = value != state["concurrency"], value
+        else:
+            factor = PAGE_SIZE_FACTOR if state["direction"] > 0 else 1 / PAGE_SIZE_FACTOR
+            value = self._clamp(round(state["page_size"] * factor), self.page_size_bounds)
+            changed, state["page_size"] = value != state["page_size"], value
+        return changed
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            try:
+                with open(self.path, 'r') as f:
+                    saved = json.load(f)
+            except (FileNotFoundError, ValueError):
+                saved = {}
+            saved[self.platform] = self._states
+            atomic_write(self.path, json.dumps(saved, indent=2, sort_keys=True).encode())
+
+
+_tuners: Dict[Tuple[str, str], Autotuner] = {}
+_tuners_lock = threading.Lock()
+
+
+def get_autotuner(crawler_class, path: Optional[str] = None) -> Autotuner:
+    """Return the tuner shared by every crawler of a platform in this process"""
+    path = os.path.abspath(path or os.getenv('AUTOTUNE_STATE', DEFAULT_STATE_PATH))
+    with _tuners_lock:
+        tuner = _tuners.get((crawler_class.platform, path))
+        if tuner is None:
+            tuner = _tuners[(crawler_class.platform, path)] = Autotuner(
+                crawler_class.platform, path, crawler_class.default_page_size,
+                crawler_class.page_size_bounds, crawler_class.concurrency_bounds
+            )
+        return tuner
@@ -1,16 +1,251 @@
+import hashlib
+import logging
+import threading
+import time
+import requests
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 from models.order import StandardizedOrder
+from .autotune import Autotuner, Episode
+from .deadline import Deadline, DeadlineExceeded, get_latency_tracker
+from .metadata import MetadataCache, get_metadata_cache
+from .rate_limit import RateLimiter
+from .recording import PageRecorder, PageReplayer, RecordedResponse, endpoint_name
+
+# Passed as `extra` on per-order log records so they can be sampled (see jobs.logging_config)
+ORDER_EVENT = {"sampled": True, "event": "order.convert"}
+
+# Retries of a throttled (HTTP 429) page request before giving up
+MAX_THROTTLE_RETRIES = 3
+# Response bodies are read in chunks, so a cancelled or out-of-budget request stops mid-body
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """A hedged request whose twin answered first"""
+
 
 class BaseCrawler(ABC):
-    def __init__(self, api_token: str):
+    platform: str = None
+    # Last path segment of the orders endpoint, and the key holding the orders in its JSON pages
+    orders_endpoint: str = None
+    orders_key: str = "data"
+    # Page size used without autotuning, and the bounds the autotuner may move within
+    default_page_size: int = 100
+    page_size_bounds: Tuple[int, int] = (100, 100)
+    concurrency_bounds: Tuple[int, int] = (1, 4)
+    # Longest a single request may take to connect or between received bytes
+    request_timeout: float = 30.0
+    # Latency percentile of the endpoint after which a GET is sent a second time; None disables hedging
+    hedge_percentile: Optional[float] = 0.95
+
+    def __init__(self, api_token: str, rate_limiter: Optional[RateLimiter] = None):
         self.api_token = api_token
         self.base_url = None
         self.headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
+        self.rate_limiter = rate_limiter
+        # Optional storage.fingerprints.FingerprintIndex; unchanged orders are not re-converted
+        self.fingerprints = None
+        self.metadata: MetadataCache = get_metadata_cache()
+        # Optional crawlers.recording.PageRecorder / PageReplayer, see crawlers/recording.py
+        self.recorder: Optional[PageRecorder] = None
+        self.replayer: Optional[PageReplayer] = None
+        # Optional crawlers.autotune.Autotuner choosing page size and concurrency per fetch
+        self.autotuner: Optional[Autotuner] = None
+        # Time budget of this crawl, see crawlers/deadline.py; requests fail with DeadlineExceeded past it
+        self.deadline: Deadline = Deadline()
+        # Set when the budget ran out part way through a listing and only some pages were returned
+        self.truncated = False
+
+    def _cache_key(self, name: str) -> str:
+        """Metadata cache key scoped to this platform and API token"""
+        # A digest, so raw tokens are not written to the cache file
+        return f"{self.platform}:{name}:{hashlib.sha256(self.api_token.encode()).hexdigest()[:16]}"
+
+    def _get(self, url: str, **kwargs) -> Union[requests.Response, RecordedResponse]:
+        """
+        Send a GET request, waiting for the token's rate budget first. The
+        request times out with the crawl's deadline; when it takes longer than
+        the endpoint's hedge percentile, a duplicate is sent and the first
+        answer wins.
+        """
+        self.deadline.timeout(self.request_timeout)
+        if self.replayer is not None:
+            return self.replayer.get(self.platform, url)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        kwargs.setdefault("headers", self.headers)
+        tracker = get_latency_tracker(self.platform, endpoint_name(url))
+        hedge_after = tracker.percentile(self.hedge_percentile) if self.hedge_percentile else None
+
+        started = time.monotonic()
+        if hedge_after is None:
+            response = self._send(url, kwargs, threading.Event())
+        else:
+            response = self._hedged_send(url, kwargs, hedge_after)
+        # Time until the caller had an answer, so hedged requests don't pull the percentile down
+        tracker.add(time.monotonic() - started)
+        if self.recorder is not None:
+            self.recorder.record(self.platform, url, kwargs.get("params"), response)
+        return response
+
+    def _send(self, url: str, kwargs: Dict, cancel: threading.Event) -> requests.Response:
+        """One GET within the remaining budget, abandoned as soon as `cancel` is set"""
+        try:
+            response = requests.get(url, timeout=self.deadline.timeout(self.request_timeout), stream=True, **kwargs)
+        except requests.exceptions.Timeout as e:
+            if self.deadline.expired():
+                raise DeadlineExceeded(f"{self.deadline.name} time budget exhausted waiting for {url}") from e
+            raise
+        try:
+            chunks = []
+            for chunk in response.iter_content(RESPONSE_CHUNK_SIZE):
+                if cancel.is_set():
+                    raise RequestCancelled(f"Hedged request to {url} superseded")
+                if self.deadline.expired():
+                    raise DeadlineExceeded(f"{self.deadline.name} time budget exhausted while reading {url}")
+                chunks.append(chunk)
+            # What a non-streamed request would have read, so callers use .json()/.text as usual
+            response._content = b"".join(chunks)
+        finally:
+            # Returns the connection when the body was read, drops it when abandoned
+            response.close()
+        return response
+
+    def _hedged_send(self, url: str, kwargs: Dict, hedge_after: float) -> requests.Response:
+        """
+        Send the GET; if it hasn't answered after `hedge_after` seconds, send it
+        again. Whichever succeeds first is returned and the other is cancelled.
+        GETs are idempotent, so the duplicate is harmless to the API.
+        """
+        cancel = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{self.platform}-hedge")
+        try:
+            done, pending = wait({pool.submit(self._send, url, kwargs, cancel)}, timeout=hedge_after)
+            # A hedge spends rate budget too; skip it rather than queue behind the limiter
+            if not done and not self.deadline.expired() and \
+                    (self.rate_limiter is None or self.rate_limiter.try_acquire()):
+                logging.getLogger(f"pod_crawler.{self.platform}").debug(
+                    "No answer from %s after %.2fs, hedging", endpoint_name(url), hedge_after
+                )
+                pending.add(pool.submit(self._send, url, kwargs, cancel))
+            first_error = None
+            while True:
+                for future in done:
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        first_error = first_error or e
+                if not pending:
+                    raise first_error
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        finally:
+            cancel.set()
+            pool.shutdown(wait=False)
+
+    def _orders_from_page(self, data) -> list:
+        """The raw orders of one JSON page of the orders endpoint"""
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict) and self.orders_key in data:
+            return data.get(self.orders_key) or []
+        logging.getLogger(f"pod_crawler.{self.platform}").warning("Unexpected response format: %s", type(data))
+        return []
+
+    def _page_params(self, page: int, page_size: int) -> dict:
+        """Query parameters selecting page `page` (0-based) of `page_size` orders"""
+        return {}
+
+    def _page_count(self, data, page_size: int) -> int:
+        """Number of pages of the listing, from its first page"""
+        return 1
+
+    def _get_all_pages(self, url: str, params: dict) -> list:
+        """
+        Fetch every page of an orders listing. The first page gives the page
+        count; the rest are fetched with up to `concurrency` requests in flight.
+        When the time budget runs out, the pages fetched so far are returned and
+        `truncated` is set.
+        """
+        episode = self.autotuner.start() if self.autotuner is not None else None
+        page_size, concurrency = episode.settings if episode is not None else (self.default_page_size, 1)
+
+        logger = logging.getLogger(f"pod_crawler.{self.platform}")
+        started = time.monotonic()
+        orders, fetched = [], {}
+        pages_fetched = 0
+        try:
+            try:
+                orders, data = self._get_page(url, params, 0, page_size, episode)
+            except DeadlineExceeded as e:
+                self.truncated = True
+                logger.warning("%s before the first page of %s", e, endpoint_name(url))
+                return []
+            pages_fetched = 1
+            pages = self._page_count(data, page_size)
+
+            first_error = None
+            if pages > 1:
+                with ThreadPoolExecutor(max_workers=min(concurrency, pages - 1)) as pool:
+                    futures = {pool.submit(self._get_page, url, params, page, page_size, episode): page
+                               for page in range(1, pages)}
+                    for future in as_completed(futures):
+                        try:
+                            fetched[futures[future]] = future.result()[0]
+                        except DeadlineExceeded:
+                            self.truncated = True
+                        except Exception as e:
+                            first_error = first_error or e
+            pages_fetched += len(fetched)
+            if first_error is not None:
+                raise first_error
+            for page in sorted(fetched):
+                orders.extend(fetched[page])
+        finally:
+            # Failed episodes are judged too, or failing requests would never back off
+            if episode is not None:
+                self.autotuner.finish(episode, len(orders), pages_fetched, time.monotonic() - started)
+
+        if self.truncated:
+            # Partial results; the caller saves them and the listing is crawled again next run
+            logger.warning("%s time budget exhausted: returning %s orders from %s of %s pages",
+                           self.deadline.name, len(orders), 1 + len(fetched), pages)
+        else:
+            logger.info("Fetched %s orders in %s pages of %s with %s in flight", len(orders), pages, page_size, concurrency)
+        return orders
+
+    def _get_page(self, url: str, params: dict, page: int, page_size: int,
+                  episode: Optional[Episode] = None) -> Tuple[list, object]:
+        """
+        (orders, decoded JSON) of one page, retrying throttled requests after their
+        Retry-After delay; requests are reported to the autotuner as part of `episode`
+        """
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            try:
+                response = self._get(url, params={**params, **self._page_params(page, page_size)})
+            except requests.exceptions.RequestException:
+                if episode is not None:
+                    self.autotuner.observe(episode, error=True)
+                raise
+            throttled = response.status_code == 429
+            if episode is not None:
+                self.autotuner.observe(episode, throttled=throttled, error=response.status_code >= 500)
+            if throttled and attempt < MAX_THROTTLE_RETRIES:
+                retry_after = response.headers.get("Retry-After", "")
+                delay = int(retry_after) if retry_after.isdigit() else 2 ** attempt
+                remaining = self.deadline.remaining()
+                if remaining is not None and remaining <= delay:
+                    raise DeadlineExceeded(f"{self.deadline.name} time budget ends before the throttle delay of {delay}s")
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            data = response.json()
+            return self._orders_from_page(data), data
 
     @abstractmethod
     def get_orders(self, start_date: datetime, end_date: datetime) -> List[StandardizedOrder]:
@@ -20,6 +255,37 @@ class BaseCrawler(ABC):
         """
         pass
 
+    @abstractmethod
+    def _convert_to_standardized(self, order: dict) -> StandardizedOrder:
+        """Convert one raw platform order to the standardized format"""
+        pass
+
+    def convert_batch(self, orders: List[dict]) -> List[StandardizedOrder]:
+        """Convert a page of raw orders in one call, skipping orders that fail"""
+        logger = logging.getLogger(f"pod_crawler.{self.platform}")
+        convert = self._convert_to_standardized
+        standardized_orders = []
+        skipped = failed = 0
+        for order in orders:
+            if self.fingerprints is not None and isinstance(order, dict) and \
+                    self.fingerprints.is_unchanged(self.platform, str(order.get('id')), order):
+                skipped += 1
+                continue
+            try:
+                standardized_orders.append(convert(order))
+            except Exception as e:
+                failed += 1
+                order_id = order.get('id', 'unknown') if isinstance(order, dict) else 'unknown'
+                logger.error("Error processing %s order %s: %s", self.platform, order_id, e, exc_info=True)
+        # One summary record per page instead of per-order chatter
+        logger.info(
+            "Converted %s of %s %s orders (%s unchanged, %s failed)",
+            len(standardized_orders), len(orders), self.platform, skipped, failed,
+            extra={"event": "convert.summary", "platform": self.platform, "converted": len(standardized_orders),
+                   "received": len(orders), "unchanged": skipped, "failed": failed}
+        )
+        return standardized_orders
+
     def _get_yesterday_range(self) -> tuple[datetime, datetime]:
         """Helper method to get yesterday's date range"""
         today = datetime.now()
@@ -1,15 +1,47 @@
 import requests
 import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from models.order import StandardizedOrder, Customer, OrderItem
-from .base import BaseCrawler
+from .base import BaseCrawler, ORDER_EVENT
+from .mapping import Field, Mapper
+from .rate_limit import RateLimiter
 
 logger = logging.getLogger("pod_crawler.burger_prints")
 
+ORDER_MAPPER = Mapper({
+    "order_id": Field("id", default="unknown"),
+    "name": Field("shipping.name", default=""),
+    "email": Field("shipping.email", default=""),
+    "address": Field("shipping.address.line1", default=""),
+    "city": Field("shipping.address.city", default=""),
+    "country": Field("shipping.address.country", default=""),
+    "zip_code": Field("shipping.address.postal_code", default=""),
+    "items": Field("items", default=()),
+    "subtotal": Field("sub_amount", cast=float, default=0.0),
+    "shipping_cost": Field("shipping_fee", cast=float, default=0.0),
+    "total_cost": Field("amount", cast=float),
+    "status": Field("status", default="unknown"),
+    "trackings": "trackings",
+}, name="burger_prints.order")
+
+ITEM_MAPPER = Mapper({
+    "base_short_code": Field("base_short_code", default=""),
+    "size_name": Field("size_name", default=""),
+    "size": "size_name",
+    "amount": Field("amount", cast=float, default=0.0),
+    "quantity": Field("quantity", cast=int, default=1),
+    "price": Field("price", cast=float, default=0.0),
+    "sku": "catalog_sku",
+    "product_id": "id",
+}, name="burger_prints.item")
+
 class BurgerPrintsCrawler(BaseCrawler):
-    def __init__(self, api_token: str):
-        super().__init__(api_token)
+    platform = "burger_prints"
+    orders_endpoint = "order"
+
+    def __init__(self, api_token: str, rate_limiter: Optional[RateLimiter] = None):
+        super().__init__(api_token, rate_limiter)
         self.base_url = "https://api.burgerprints.com/v2"
         self.headers = {
             'api-key': api_token  # Only use the api-key header
@@ -17,25 +49,17 @@ class BurgerPrintsCrawler(BaseCrawler):
 
     def get_orders(self, start_date: datetime, end_date: datetime) -> List[StandardizedOrder]:
         endpoint = f"{self.base_url}/order"
-        logger.info(f"Fetching orders from {start_date} to {end_date}")
-        logger.info(f"Request URL: {endpoint}")
+        logger.info("Fetching orders from %s to %s", start_date, end_date)
+        logger.info("Request URL: %s", endpoint)
 
         try:
             # Get all orders from the API
-            response = requests.get(endpoint, headers=self.headers)
+            response = self._get(endpoint)
             response.raise_for_status()
             data = response.json()
             
-            # Handle different response formats
-            if isinstance(data, list):
-                all_orders = data
-            elif isinstance(data, dict) and 'data' in data:
-                all_orders = data.get("data", [])
-            else:
-                logger.warning(f"Unexpected response format: {type(data)}")
-                all_orders = []
-                
-            logger.info(f"Retrieved {len(all_orders)} orders from Burger Prints API")
+            all_orders = self._orders_from_page(data)
+            logger.info("Retrieved %s orders from Burger Prints API", len(all_orders))
             
             # Filter orders by date
             filtered_orders = []
@@ -44,32 +68,22 @@ class BurgerPrintsCrawler(BaseCrawler):
                 if order_date and start_date <= order_date <= end_date:
                     filtered_orders.append(order)
             
-            logger.info(f"Filtered to {len(filtered_orders)} orders within date range {start_date.date()} to {end_date.date()}")
+            logger.info("Filtered to %s orders within date range %s to %s", len(filtered_orders), start_date.date(), end_date.date())
             
             # Convert to standardized format
-            standardized_orders = []
-            for order in filtered_orders:
-                try:
-                    standardized_order = self._convert_to_standardized(order)
-                    standardized_orders.append(standardized_order)
-                except Exception as e:
-                    order_id = order.get('id', 'unknown')
-                    logger.error(f"Error processing order {order_id}: {str(e)}", exc_info=True)
-                    continue
-
-            return standardized_orders
+            return self.convert_batch(filtered_orders)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error fetching orders: {str(e)}", exc_info=True)
+            logger.error("Request error fetching orders: %s", e, exc_info=True)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error fetching orders: {str(e)}", exc_info=True)
+            logger.error("Unexpected error fetching orders: %s", e, exc_info=True)
             raise
 
     def _parse_order_date(self, order: dict) -> datetime:
         """Extract and parse the order date"""
         created_date = order.get('created_date')
         if not created_date:
-            logger.warning(f"No created_date field for order {order.get('id', 'unknown')}")
+            logger.warning("No created_date field for order %s", order.get('id', 'unknown'))
             return None
             
         try:
@@ -84,74 +98,64 @@ class BurgerPrintsCrawler(BaseCrawler):
             
             return datetime(year, month, day, hour, minute, second)
         except (ValueError, IndexError) as e:
-            logger.warning(f"Error parsing date '{created_date}' for order {order.get('id', 'unknown')}: {str(e)}")
+            logger.warning("Error parsing date '%s' for order %s: %s", created_date, order.get('id', 'unknown'), e)
             return None
 
     def _convert_to_standardized(self, order: dict) -> StandardizedOrder:
-        order_id = order.get('id', 'unknown')
-        logger.debug(f"Converting order {order_id} to standardized format")
+        fields = ORDER_MAPPER(order)
+        order_id = fields['order_id']
+        logger.debug("Converting order %s to standardized format", order_id, extra=ORDER_EVENT)
         
-        # Extract customer information from shipping address
-        shipping = order.get('shipping', {})
+        # Customer information comes from the shipping address
+        shipping = order.get('shipping')
         if isinstance(shipping, dict) and 'address' in shipping:
-            address = shipping.get('address', {})
             customer = Customer(
-                name=shipping.get('name', ''),
-                email=shipping.get('email', ''),
-                address=address.get('line1', ''),
-                city=address.get('city', ''),
-                country=address.get('country', ''),
-                zip_code=address.get('postal_code', '')
+                name=fields['name'],
+                email=fields['email'],
+                address=fields['address'],
+                city=fields['city'],
+                country=fields['country'],
+                zip_code=fields['zip_code']
             )
         else:
             # Fallback for missing shipping info
-            customer = Customer(
-                name='',
-                email='',
-                address='',
-                city='',
-                country='',
-                zip_code=''
-            )
+            customer = Customer(name='', email='', address='', city='', country='', zip_code='')
 
         # Extract order items
         items = []
         items_amount_total = 0.0
-        for item in order.get('items', []):
-            product_name = f"{item.get('base_short_code', '')} - {item.get('size_name', '')}"
+        for item in fields['items']:
+            item_fields = ITEM_MAPPER(item)
+            product_name = f"{item_fields.pop('base_short_code')} - {item_fields.pop('size_name')}"
             # Get item amount (final price for this item)
-            item_amount = float(item.get('amount', 0))
-            items_amount_total += item_amount
+            items_amount_total += item_fields.pop('amount')
             
             order_item = OrderItem(
+                **item_fields,
                 product_name=product_name if product_name.strip() else 'Unknown Product',
-                quantity=int(item.get('quantity', 1)),
-                price=float(item.get('price', 0)),
-                variant=item.get('size_name'),
-                size=item.get('size_name'),
+                variant=item_fields['size'],
                 color='',  # Color info not available
-                sku=item.get('catalog_sku'),
-                product_id=item.get('id'),
                 raw_data=item  # Store the complete raw item data
             )
             items.append(order_item)
 
-        # Calculate costs with fallbacks
-        subtotal = float(order.get('sub_amount', 0))
-        shipping_cost = float(order.get('shipping_fee', 0))
-        total_cost = float(order.get('amount', subtotal + shipping_cost))
+        subtotal = fields['subtotal']
+        shipping_cost = fields['shipping_cost']
+        total_cost = fields['total_cost']
+        if total_cost is None:
+            total_cost = subtotal + shipping_cost
         
         # Use the total amount from items as the final price
         final_price = items_amount_total
-        logger.debug(f"Order {order_id}: final_price from items.amount total: {final_price}")
+        logger.debug("Order %s: final_price from items.amount total: %s", order_id, final_price, extra=ORDER_EVENT)
 
         # Convert created_date to datetime
         order_date = self._parse_order_date(order) or datetime.now()
 
         # Get tracking info
         tracking_number = None
-        trackings = order.get('trackings', [])
-        if trackings and isinstance(trackings, list) and len(trackings) > 0:
+        trackings = fields['trackings']
+        if trackings and isinstance(trackings, list):
             tracking_number = trackings[0].get('code')
 
         # Create standardized order
@@ -165,9 +169,9 @@ class BurgerPrintsCrawler(BaseCrawler):
             shipping_cost=shipping_cost,
             total_cost=total_cost,
             final_price=final_price,
-            status=order.get('status', 'unknown'),
+            status=fields['status'],
             tracking_number=tracking_number,
             raw_data=order
         )
         
-        return standardized_order 
\ No newline at end of file
+        return standardized_order
@@ -0,0 +1,93 @@
+"""
+Time budgets and latency tracking for API requests.
+
+A Deadline is the point in time a crawl must be done by. The run's deadline is
+narrowed per platform and handed to each crawler, whose requests take their
+timeouts from what is left of it. LatencyTracker keeps recent response times
+per endpoint, so a request that takes longer than most can be hedged with a
+duplicate.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# Recent requests per endpoint the latency percentiles are computed from
+LATENCY_WINDOW = 200
+# Below this many samples the percentile is not trusted
+MIN_LATENCY_SAMPLES = 20
+
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget of the run or platform ran out"""
+
+
+class Deadline:
+    """A point in monotonic time work must be done by; no expiry when `expires_at` is None"""
+
+    def __init__(self, expires_at: Optional[float] = None, name: str = "run"):
+        self.expires_at = expires_at
+        self.name = name
+
+    @classmethod
+    def after(cls, seconds: Optional[float], name: str = "run") -> 'Deadline':
+        return cls(None if seconds is None else time.monotonic() + seconds, name)
+
+    def within(self, seconds: Optional[float], name: str) -> 'Deadline':
+        """This deadline, narrowed to at most `seconds` from now"""
+        if seconds is None:
+            return self
+        expires_at = time.monotonic() + seconds
+        if self.expires_at is not None and self.expires_at <= expires_at:
+            return self
+        return Deadline(expires_at, name)
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for the next request: `cap`, or less when the budget is nearly spent"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.name} time budget exhausted")
+        return min(cap, remaining)
+
+
+class LatencyTracker:
+    """Recent response times of one endpoint"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """The `fraction` (e.g. 0.95) percentile, or None until enough requests were seen"""
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+_trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(platform: str, endpoint: str) -> LatencyTracker:
+    """Return the tracker shared by every crawler of this process calling `endpoint`"""
+    with _trackers_lock:
+        tracker = _trackers.get((platform, endpoint))
+        if tracker is None:
+            tracker = _trackers[(platform, endpoint)] = LatencyTracker()
+        return tracker
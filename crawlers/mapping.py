@@ -0,0 +1,102 @@
+"""
+Declarative field mapping from raw platform payloads to flat field dicts.
+
+A spec maps output names to `Field`s. `Mapper` compiles the spec once into a
+plain Python function, so extraction runs as a straight sequence of
+`dict.get` calls with no per-field interpretation at runtime.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+_EMPTY: Dict[str, Any] = {}
+
+
+class Field:
+    """
+    One output field of a mapping spec.
+
+    path: dotted path into the source dict, e.g. "address_to.first_name"
+    cast: callable applied to the raw value, e.g. float or int
+    scale: divisor applied after the cast, e.g. 100 for cents to dollars
+    default: value used when the path is missing, like dict.get(key, default); with
+             a cast, also when the value is None or ""
+    """
+
+    def __init__(self, path: str, cast: Optional[Callable] = None,
+                 scale: Optional[float] = None, default: Any = None):
+        self.path = path
+        self.cast = cast
+        self.scale = scale
+        self.default = default
+
+
+class Mapper:
+    """Compiled extractor for a spec of output name -> Field (or bare path string)"""
+
+    def __init__(self, spec: Dict[str, Union[Field, str]], name: str = "mapping"):
+        self.spec = {key: field if isinstance(field, Field) else Field(field)
+                     for key, field in spec.items()}
+        self.name = name
+        self.source = _generate_source(self.spec)
+        self._extract = _compile(self.source, self.spec, name)
+
+    def __call__(self, source: dict) -> Dict[str, Any]:
+        return self._extract(source)
+
+    def many(self, sources: Iterable[dict]) -> List[Dict[str, Any]]:
+        """Extract every source dict of a page in one call"""
+        extract = self._extract
+        return [extract(source) for source in sources]
+
+
+def _generate_source(spec: Dict[str, Field]) -> str:
+    lines = ["def extract(src):"]
+    containers = {(): "src"}
+
+    def container(parts):
+        # Each intermediate dict is looked up once and shared by all fields below it
+        if parts in containers:
+            return containers[parts]
+        parent = container(parts[:-1])
+        var = f"_c{len(containers)}"
+        lines.append(f"    {var} = {parent}.get({parts[-1]!r})")
+        lines.append(f"    if {var}.__class__ is not dict: {var} = _EMPTY")
+        containers[parts] = var
+        return var
+
+    values = []
+    for index, (key, field) in enumerate(spec.items()):
+        parts = tuple(field.path.split("."))
+        parent = container(parts[:-1])
+        value = f"_v{index}"
+        if field.cast is None and field.scale is None:
+            # An explicit null is kept, as with dict.get(key, default)
+            default = f", _default{index}" if field.default is not None else ""
+            lines.append(f"    {value} = {parent}.get({parts[-1]!r}{default})")
+            values.append(f"{key!r}: {value}")
+            continue
+        lines.append(f"    {value} = {parent}.get({parts[-1]!r})")
+
+        if field.cast is None:
+            converted = value
+            missing = f"{value} is None"
+        else:
+            converted = f"_cast{index}({value})"
+            missing = f"{value} is None or {value} == ''"
+        if field.scale is not None:
+            converted = f"{converted} / _scale{index}"
+        if converted != value or field.default is not None:
+            lines.append(f"    {value} = _default{index} if {missing} else {converted}")
+        values.append(f"{key!r}: {value}")
+
+    lines.append("    return {" + ", ".join(values) + "}")
+    return "\n".join(lines)
+
+
+def _compile(source: str, spec: Dict[str, Field], name: str) -> Callable[[dict], Dict[str, Any]]:
+    namespace: Dict[str, Any] = {"_EMPTY": _EMPTY}
+    for index, field in enumerate(spec.values()):
+        namespace[f"_cast{index}"] = field.cast
+        namespace[f"_scale{index}"] = field.scale
+        namespace[f"_default{index}"] = field.default
+    exec(compile(source, f"<mapping {name}>", "exec"), namespace)
+    return namespace["extract"]
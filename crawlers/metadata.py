@@ -0,0 +1,183 @@
+"""
+Persistent cache for slow-changing reference data shared by every crawler:
+shop lists, currency rates and similar lookups.
+
+Entries live in a small SQLite file with a per-key expiry, so a new process
+reuses what the previous run fetched instead of asking the API again. Values
+are memoized in memory once read, so repeated lookups such as one currency
+rate per converted order are dict lookups.
+"""
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger("pod_crawler.metadata")
+
+DEFAULT_CACHE_PATH = "./data/metadata_cache.db"
+DEFAULT_RATES_PATH = "./rates.json"
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+
+_MISSING = object()
+
+
+class MetadataCache:
+    """Key-value store with per-key TTLs, backed by SQLite and memoized in process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._memo: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so crawlers that never look anything up don't create the file
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute(SCHEMA)
+        return self._conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """The cached value, or `default` if the key is missing or expired"""
+        now = time.time()
+        entry = self._memo.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return default
+            value = json.loads(row[0])
+            self._memo[key] = (value, row[1])
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a JSON-serializable value for `ttl` seconds"""
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._memo[key] = (value, expires_at)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: float) -> Any:
+        """The cached value, calling `loader` and caching its result when missing or expired"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._memo.pop(key, None)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            now = time.time()
+            self._memo = {key: entry for key, entry in self._memo.items() if entry[1] > now}
+            return self._connection().execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+
+
+_caches: Dict[str, MetadataCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_metadata_cache(path: Optional[str] = None) -> MetadataCache:
+    """Return the cache shared by every crawler of this process (METADATA_CACHE, default ./data/metadata_cache.db)"""
+    path = os.path.abspath(path or os.getenv('METADATA_CACHE', DEFAULT_CACHE_PATH))
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = MetadataCache(path)
+        return cache
+
+
+# Used only for a currency missing from the rates file, so crawls keep working without one
+FALLBACK_USD_RATES = {"EUR": 1.08}
+RATES_TTL = 6 * 3600
+
+
+class CurrencyRates:
+    """
+    USD value of one unit of a currency per day, read from a local JSON file
+    (CURRENCY_RATES, default ./rates.json) of the form
+
+        {"EUR": {"2025-03-03": 1.0835, "2025-03-04": 1.0612, ...}}
+
+    A day without a rate (weekends, holidays) uses the closest earlier day, and
+    days before the first rate use the first rate.
+    """
+
+    def __init__(self, cache: MetadataCache, path: Optional[str] = None):
+        self.cache = cache
+        self.path = path or os.getenv('CURRENCY_RATES', DEFAULT_RATES_PATH)
+        self._tables: Dict[str, Tuple[List[str], List[float]]] = {}
+        self._rates: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def _load_file(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _table(self, currency: str) -> Tuple[List[str], List[float]]:
+        table = self._tables.get(currency)
+        if table is None:
+            with self._lock:
+                # Keyed on the file's mtime so an updated rates file is picked up by the next run
+                try:
+                    version = os.stat(self.path).st_mtime_ns
+                except FileNotFoundError:
+                    version = 0
+                rates = self.cache.get_or_load(f"fx:{os.path.abspath(self.path)}:{version}", self._load_file, RATES_TTL)
+                days = sorted(rates.get(currency, {}))
+                table = self._tables[currency] = (days, [float(rates[currency][day]) for day in days])
+                if not days:
+                    logger.warning("No %s rates in %s, using the fallback rate %s",
+                                   currency, self.path, FALLBACK_USD_RATES.get(currency))
+        return table
+
+    def rate(self, currency: str, day: Union[date, datetime, str]) -> float:
+        """USD per unit of `currency` on `day`"""
+        day_key = day if isinstance(day, str) else day.strftime('%Y-%m-%d')
+        rate = self._rates.get((currency, day_key))
+        if rate is not None:
+            return rate
+
+        days, values = self._table(currency)
+        if days:
+            position = bisect.bisect_right(days, day_key)
+            rate = values[max(position - 1, 0)]
+        else:
+            rate = FALLBACK_USD_RATES[currency]
+        self._rates[(currency, day_key)] = rate
+        return rate
+
+
+_rates: Dict[str, CurrencyRates] = {}
+
+
+def get_currency_rates(path: Optional[str] = None) -> CurrencyRates:
+    """Return the rates shared by every crawler of this process"""
+    cache = get_metadata_cache()
+    key = f"{cache.path}|{os.path.abspath(path or os.getenv('CURRENCY_RATES', DEFAULT_RATES_PATH))}"
+    with _caches_lock:
+        rates = _rates.get(key)
+        if rates is None:
+            rates = _rates[key] = CurrencyRates(cache, path)
+        return rates
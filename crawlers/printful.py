@@ -1,124 +1,135 @@
-import requests
 import logging
 from datetime import datetime
 from typing import List, Tuple, Optional
 from models.order import StandardizedOrder, Customer, OrderItem
-from .base import BaseCrawler
+from .base import BaseCrawler, ORDER_EVENT
+from .metadata import get_currency_rates
+from .mapping import Field, Mapper
+from .rate_limit import RateLimiter
 
 logger = logging.getLogger("pod_crawler.printful")
 
+# Printful amounts are in EUR and converted to USD after extraction
+ORDER_MAPPER = Mapper({
+    "order_id": Field("id", default="unknown"),
+    "name": Field("recipient.name", default=""),
+    "last_name": Field("recipient.last_name", default=""),
+    "email": Field("recipient.email", default=""),
+    "address": Field("recipient.address1", default=""),
+    "city": Field("recipient.city", default=""),
+    "country": Field("recipient.country_code", default=""),
+    "zip_code": Field("recipient.zip", default=""),
+    "items": Field("items", default=[]),
+    "costs": Field("costs", default={}),
+    "subtotal": Field("costs.subtotal", cast=float, default=0.0),
+    "shipping": Field("costs.shipping", cast=float, default=0.0),
+    "total": Field("costs.total", cast=float, default=0.0),
+    "created": "created",
+    "status": Field("status", default="pending"),
+    "tracking_number": Field("tracking_number", default=""),
+}, name="printful.order")
+
+ITEM_MAPPER = Mapper({
+    "product_name": Field("name", default="Unknown Product"),
+    "quantity": Field("quantity", default=1),
+    "price": Field("price", cast=float, default=0.0),
+    "variant": Field("variant", default=""),
+    "size": Field("size", default=""),
+    "color": Field("color", default=""),
+    "sku": "sku",
+    "variant_id": "variant_id",
+}, name="printful.item")
+
 class PrintfulCrawler(BaseCrawler):
-    def __init__(self, api_token: str):
-        super().__init__(api_token)
+    platform = "printful"
+    orders_endpoint = "orders"
+    orders_key = "result"
+    page_size_bounds = (20, 100)
+
+    def __init__(self, api_token: str, rate_limiter: Optional[RateLimiter] = None):
+        super().__init__(api_token, rate_limiter)
         self.base_url = "https://api.printful.com"
-        # Fixed EUR to USD conversion rate - update this regularly in production
-        self.eur_to_usd_rate = 1.08  # Example rate as of March 2025
+        # EUR to USD rates by day, from the local rates file (see crawlers.metadata.CurrencyRates)
+        self.currency_rates = get_currency_rates()
 
     def get_orders(self, start_date: datetime, end_date: datetime) -> List[StandardizedOrder]:
         endpoint = f"{self.base_url}/orders"
         params = {
-            "offset": 0,
-            "limit": 100,
             "from": int(start_date.timestamp()),
             "to": int(end_date.timestamp())
         }
 
-        logger.info(f"Fetching Printful orders from {start_date} to {end_date}")
-        logger.info(f"Request URL: {endpoint}")
-        logger.info(f"Request params: {params}")
+        logger.info("Fetching Printful orders from %s to %s", start_date, end_date)
+        logger.info("Request URL: %s", endpoint)
+        logger.info("Request params: %s", params)
 
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            logger.debug(f"Response data type: {type(data)}")
-            if isinstance(data, dict) and 'result' in data:
-                orders = data.get("result", [])
-                logger.info(f"Retrieved {len(orders)} orders from Printful API")
-                
-                # DEBUG: log first order to see structure
-                if orders and len(orders) > 0:
-                    logger.debug(f"First order sample: {orders[0]}")
-            else:
-                logger.warning(f"Unexpected response format from Printful API: {type(data)}")
-                orders = []
-
-            standardized_orders = []
-            for order in orders:
-                try:
-                    standardized_order = self._convert_to_standardized(order)
-                    standardized_orders.append(standardized_order)
-                except Exception as e:
-                    order_id = order['id'] if isinstance(order, dict) and 'id' in order else 'unknown'
-                    logger.error(f"Error processing Printful order {order_id}: {str(e)}", exc_info=True)
-                    continue
+            orders = self._get_all_pages(endpoint, params)
+            logger.info("Retrieved %s orders from Printful API", len(orders))
 
-            return standardized_orders
+            # DEBUG: log first order to see structure
+            if orders:
+                logger.debug("First order sample: %s", orders[0])
+
+            return self.convert_batch(orders)
         except Exception as e:
-            logger.error(f"Error fetching Printful orders: {str(e)}", exc_info=True)
-            return []
+            # Raised, so a backfill chunk or queue task that failed is retried instead of recorded as done
+            logger.error("Error fetching Printful orders: %s", e, exc_info=True)
+            raise
+
+    def _page_params(self, page: int, page_size: int) -> dict:
+        return {"offset": page * page_size, "limit": page_size}
+
+    def _page_count(self, data, page_size: int) -> int:
+        paging = data.get("paging") if isinstance(data, dict) else None
+        if not isinstance(paging, dict) or not paging.get("total"):
+            return 1
+        # The page size the API actually applied (a replayed recording may differ from ours)
+        limit = int(paging.get("limit") or page_size)
+        return -(-int(paging["total"]) // limit)
 
     def _convert_to_standardized(self, order: dict) -> StandardizedOrder:
-        order_id = order.get('id', 'unknown')
-        logger.debug(f"Converting Printful order {order_id} to standardized format")
+        fields = ORDER_MAPPER(order)
+        order_id = fields['order_id']
+        logger.debug("Converting Printful order %s to standardized format", order_id, extra=ORDER_EVENT)
         
-        # Printful uses EUR by default
-        original_currency = "EUR"
+        # Printful uses EUR by default; convert at the rate of the order's day
+        order_date = datetime.fromtimestamp(fields['created'] or datetime.now().timestamp())
+        eur_to_usd_rate = self.currency_rates.rate("EUR", order_date)
         
-        # Extract customer information with fallbacks for missing fields
-        recipient = order.get('recipient', {})
         customer = Customer(
-            name=f"{recipient.get('name', '')} {recipient.get('last_name', '')}".strip(),
-            email=recipient.get('email', ''),
-            address=recipient.get('address1', ''),
-            city=recipient.get('city', ''),
-            country=recipient.get('country_code', ''),
-            zip_code=recipient.get('zip', '')
+            name=f"{fields['name']} {fields['last_name']}".strip(),
+            email=fields['email'],
+            address=fields['address'],
+            city=fields['city'],
+            country=fields['country'],
+            zip_code=fields['zip_code']
         )
 
         # Extract order items and convert prices from EUR to USD
         items = []
-        order_items = order.get('items', [])
+        order_items = fields['items']
         
         if isinstance(order_items, list):
             for item in order_items:
                 if not isinstance(item, dict):
-                    logger.warning(f"Skipping non-dict item in order {order_id}: {item}")
+                    logger.warning("Skipping non-dict item in order %s: %s", order_id, item)
                     continue
                     
-                eur_price = float(item.get('price', 0))
-                usd_price = self._convert_eur_to_usd(eur_price)
-                
-                order_item = OrderItem(
-                    product_name=item.get('name', 'Unknown Product'),
-                    quantity=item.get('quantity', 1),
-                    price=usd_price,
-                    variant=item.get('variant', ''),
-                    size=item.get('size', ''),
-                    color=item.get('color', '')
-                )
-                items.append(order_item)
+                item_fields = ITEM_MAPPER(item)
+                item_fields['price'] = self._convert_eur_to_usd(item_fields['price'], eur_to_usd_rate)
+                items.append(OrderItem(**item_fields))
         else:
-            logger.warning(f"Expected list for items in order {order_id}, got {type(order_items)}")
+            logger.warning("Expected list for items in order %s, got %s", order_id, type(order_items))
 
-        # Get costs from the costs object if available
-        costs = order.get('costs', {})
+        subtotal_eur = fields['subtotal']
+        shipping_cost_eur = fields['shipping']
         
-        # Calculate costs with fallbacks and convert to USD
-        subtotal_eur = 0
-        shipping_cost_eur = 0
-        
-        if isinstance(costs, dict):
-            # Get subtotal and shipping directly from the costs breakdown
-            subtotal_eur = float(costs.get('subtotal', 0))
-            shipping_cost_eur = float(costs.get('shipping', 0))
-            total_eur = float(costs.get('total', 0))
-            
-            # Convert to USD
-            subtotal = self._convert_eur_to_usd(subtotal_eur)
-            shipping_cost = self._convert_eur_to_usd(shipping_cost_eur)
-            final_price = self._convert_eur_to_usd(total_eur)
+        if isinstance(fields['costs'], dict):
+            # Get subtotal and shipping directly from the costs breakdown, converted to USD
+            subtotal = self._convert_eur_to_usd(subtotal_eur, eur_to_usd_rate)
+            shipping_cost = self._convert_eur_to_usd(shipping_cost_eur, eur_to_usd_rate)
+            final_price = self._convert_eur_to_usd(fields['total'], eur_to_usd_rate)
         else:
             # Fallback to calculated values if costs object is not available
             subtotal = sum(item.price * item.quantity for item in items)
@@ -127,26 +138,26 @@ class PrintfulCrawler(BaseCrawler):
             
         total_cost = subtotal + shipping_cost
             
-        logger.debug(f"Printful Order {order_id}: EUR to USD - Subtotal: €{subtotal_eur:.2f} -> ${subtotal:.2f}, Shipping: €{shipping_cost_eur:.2f} -> ${shipping_cost:.2f}, Final: ${final_price:.2f}")
+        logger.debug("Printful Order %s: EUR to USD - Subtotal: €%.2f -> $%.2f, Shipping: €%.2f -> $%.2f, Final: $%.2f", order_id, subtotal_eur, subtotal, shipping_cost_eur, shipping_cost, final_price, extra=ORDER_EVENT)
 
         # Create standardized order
         standardized_order = StandardizedOrder(
             platform="printful",
             order_id=str(order_id),
-            order_date=datetime.fromtimestamp(order.get('created', datetime.now().timestamp())),
+            order_date=order_date,
             customer=customer,
             items=items,
             subtotal=subtotal,
             shipping_cost=shipping_cost,
             total_cost=total_cost,
             final_price=final_price,
-            status=order.get('status', 'pending'),
-            tracking_number=order.get('tracking_number', ''),
+            status=fields['status'],
+            tracking_number=fields['tracking_number'],
             raw_data=order
         )
         
         return standardized_order
         
-    def _convert_eur_to_usd(self, amount_eur: float) -> float:
-        """Convert amount from EUR to USD using fixed rate"""
-        return round(amount_eur * self.eur_to_usd_rate, 2) 
\ No newline at end of file
+    def _convert_eur_to_usd(self, amount_eur: float, rate: float) -> float:
+        """Convert amount from EUR to USD at the given rate"""
+        return round(amount_eur * rate, 2) 
\ No newline at end of file
@@ -1,15 +1,58 @@
 import requests
 import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from models.order import StandardizedOrder, Customer, OrderItem
-from .base import BaseCrawler
+from .base import BaseCrawler, ORDER_EVENT
+from .mapping import Field, Mapper
+from .rate_limit import RateLimiter
 
 logger = logging.getLogger("pod_crawler.printify")
 
+# Shops of an account rarely change; re-listed at most once a day
+SHOPS_TTL = 24 * 3600
+
+# Printify amounts are in cents
+ORDER_MAPPER = Mapper({
+    "order_id": Field("id", default="unknown"),
+    "first_name": Field("address_to.first_name", default=""),
+    "last_name": Field("address_to.last_name", default=""),
+    "email": Field("email", default=""),
+    "address": Field("address_to.address1", default=""),
+    "city": Field("address_to.city", default=""),
+    "country": Field("address_to.country", default=""),
+    "zip_code": Field("address_to.zip", default=""),
+    "line_items": Field("line_items", default=()),
+    "subtotal": Field("subtotal", cast=float, scale=100, default=0.0),
+    "total_price": Field("total_price", cast=float, scale=100, default=0.0),
+    "shipping_cost": Field("total_shipping", cast=float, scale=100, default=0.0),
+    "tax": Field("total_tax", cast=float, scale=100, default=0.0),
+    "created_at": "created_at",
+    "status": Field("status", default="unknown"),
+    "tracking_number": "tracking_number",
+}, name="printify.order")
+
+ITEM_MAPPER = Mapper({
+    "product_name": Field("metadata.title", default="Unknown Product"),
+    "quantity": Field("quantity", default=1),
+    "price": Field("cost", cast=float, scale=100, default=0.0),
+    "variant": "metadata.variant_label",
+    "sku": "metadata.sku",
+    "product_id": "product_id",
+    "variant_id": "variant_id",
+    "print_provider_id": "print_provider_id",
+    "blueprint_id": "blueprint_id",
+    "print_area_width": "print_area_width",
+    "print_area_height": "print_area_height",
+}, name="printify.item")
+
 class PrintifyCrawler(BaseCrawler):
-    def __init__(self, api_token: str):
-        super().__init__(api_token)
+    platform = "printify"
+    orders_endpoint = "orders.json"
+    page_size_bounds = (10, 100)
+
+    def __init__(self, api_token: str, rate_limiter: Optional[RateLimiter] = None):
+        super().__init__(api_token, rate_limiter)
         self.base_url = "https://api.printify.com/v1"
         self.shop_id = None
 
@@ -18,15 +61,28 @@ class PrintifyCrawler(BaseCrawler):
         if self.shop_id:
             return self.shop_id
 
+        shops = self.metadata.get_or_load(self._cache_key("shops"), self._fetch_shops, SHOPS_TTL)
+        # Use the first shop - shops could be a list of dictionaries with 'id'
+        first_shop = shops[0]
+        if isinstance(first_shop, dict):
+            self.shop_id = str(first_shop.get("id"))
+        else:
+            logger.error("Invalid shop format: %s", first_shop)
+            raise ValueError(f"Invalid shop format: {first_shop}")
+
+        logger.info("Selected shop ID: %s", self.shop_id)
+        return self.shop_id
+
+    def _fetch_shops(self) -> list:
         logger.info("Making API request to get Printify shops")
         endpoint = f"{self.base_url}/shops.json"
         
         try:
-            response = requests.get(endpoint, headers=self.headers)
+            response = self._get(endpoint)
             response.raise_for_status()
             
             data = response.json()
-            logger.debug(f"Received shop data type: {type(data)}")
+            logger.debug("Received shop data type: %s", type(data))
             
             # Handle the case where the response is a list directly
             if isinstance(data, list):
@@ -35,30 +91,21 @@ class PrintifyCrawler(BaseCrawler):
                 # Handle the case where the response has a 'data' property
                 shops = data.get("data", [])
                 
-            logger.debug(f"Shops data: {shops}")
+            logger.debug("Shops data: %s", shops)
             
             if not shops:
                 logger.error("No shops found in the Printify account")
                 raise ValueError("No shops found in the Printify account")
-            
-            # Use the first shop - shops could be a list of dictionaries with 'id'
-            first_shop = shops[0]
-            if isinstance(first_shop, dict):
-                self.shop_id = str(first_shop.get("id"))
-            else:
-                logger.error(f"Invalid shop format: {first_shop}")
-                raise ValueError(f"Invalid shop format: {first_shop}")
-                
-            logger.info(f"Selected shop ID: {self.shop_id}")
-            return self.shop_id
+
+            return shops
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error fetching shops: {str(e)}")
+            logger.error("Request error fetching shops: %s", e)
             raise
         except ValueError as e:
-            logger.error(f"Value error: {str(e)}")
+            logger.error("Value error: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error fetching shops: {str(e)}")
+            logger.error("Unexpected error fetching shops: %s", e)
             raise
 
     def set_shop_id(self, shop_id: str):
@@ -68,123 +115,81 @@ class PrintifyCrawler(BaseCrawler):
     def get_orders(self, start_date: datetime, end_date: datetime) -> List[StandardizedOrder]:
         # Get the shop ID if not already set
         shop_id = self.get_shop_id()
-        logger.info(f"Getting orders for shop ID: {shop_id}")
+        logger.info("Getting orders for shop ID: %s", shop_id)
 
         endpoint = f"{self.base_url}/shops/{shop_id}/orders.json"
         params = {
-            "limit": 100,
             "created_at_min": start_date.isoformat(),
             "created_at_max": end_date.isoformat()
         }
         
-        logger.info(f"Request params: {params}")
-        logger.info(f"Request URL: {endpoint}")
+        logger.info("Request params: %s", params)
+        logger.info("Request URL: %s", endpoint)
 
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            logger.debug(f"Response data type: {type(data)}")
-            
-            # Handle different response formats
-            if isinstance(data, list):
-                orders = data
-            elif isinstance(data, dict) and 'data' in data:
-                orders = data.get("data", [])
-            else:
-                logger.warning(f"Unexpected response format: {type(data)}")
-                orders = []
-                
-            logger.info(f"Retrieved {len(orders)} orders from Printify")
+            orders = self._get_all_pages(endpoint, params)
+            logger.info("Retrieved %s orders from Printify", len(orders))
             
-            standardized_orders = []
-            for order in orders:
-                try:
-                    standardized_order = self._convert_to_standardized(order)
-                    standardized_orders.append(standardized_order)
-                except Exception as e:
-                    logger.error(f"Error processing order {order.get('id')}: {str(e)}")
-                    continue
-
-            return standardized_orders
+            return self.convert_batch(orders)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error fetching orders: {str(e)}")
+            logger.error("Request error fetching orders: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error fetching orders: {str(e)}")
+            logger.error("Unexpected error fetching orders: %s", e)
             raise
 
+    def _page_params(self, page: int, page_size: int) -> dict:
+        return {"page": page + 1, "limit": page_size}
+
+    def _page_count(self, data, page_size: int) -> int:
+        if isinstance(data, dict) and data.get("last_page"):
+            return int(data["last_page"])
+        return 1
+
     def _convert_to_standardized(self, order: dict) -> StandardizedOrder:
-        order_id = order.get('id', 'unknown')
-        logger.debug(f"Converting order {order_id} to standardized format")
+        fields = ORDER_MAPPER(order)
+        order_id = fields['order_id']
+        logger.debug("Converting order %s to standardized format", order_id, extra=ORDER_EVENT)
         
-        # Extract customer information from address_to
-        address_to = order.get('address_to', {})
         customer = Customer(
-            name=f"{address_to.get('first_name', '')} {address_to.get('last_name', '')}".strip(),
-            email=order.get('email', ''),
-            address=address_to.get('address1', ''),
-            city=address_to.get('city', ''),
-            country=address_to.get('country', ''),
-            zip_code=address_to.get('zip', '')
+            name=f"{fields['first_name']} {fields['last_name']}".strip(),
+            email=fields['email'],
+            address=fields['address'],
+            city=fields['city'],
+            country=fields['country'],
+            zip_code=fields['zip_code']
         )
 
-        # Extract order items from raw_data.line_items
         items = []
-        for item in order.get('line_items', []):
-            metadata = item.get('metadata', {})
+        for item in fields['line_items']:
+            item_fields = ITEM_MAPPER(item)
             # Extract size and color from variant_label (format: "Color / Size")
-            variant_label = metadata.get('variant_label', '')
+            variant_label = item_fields['variant'] or ''
             color, size = variant_label.split(' / ') if ' / ' in variant_label else (variant_label, variant_label)
             
-            # Convert prices from cents to dollars/euros
-            item_cost = item.get('cost', 0)
-            # Printify prices are in cents, divide by 100 to get dollars/euros
-            item_price = float(item_cost) / 100.0 if item_cost else 0
-            
             order_item = OrderItem(
-                product_name=metadata.get('title', 'Unknown Product'),
-                quantity=item.get('quantity', 1),
-                price=item_price,
-                variant=metadata.get('variant_label'),
+                **item_fields,
                 size=size,
                 color=color,
-                sku=metadata.get('sku'),
-                product_id=item.get('product_id'),
-                variant_id=item.get('variant_id'),
-                print_provider_id=item.get('print_provider_id'),
-                blueprint_id=item.get('blueprint_id'),
-                print_area_width=item.get('print_area_width'),
-                print_area_height=item.get('print_area_height'),
                 raw_data=item  # Store the complete raw item data
             )
             items.append(order_item)
 
-        # Calculate costs with fallbacks - convert from cents to dollars/euros
-        subtotal_cents = order.get('subtotal', 0)
-        subtotal = float(subtotal_cents) / 100.0 if subtotal_cents else 0
-        
-        total_price_cents = order.get('total_price', 0)
-        total_price = float(total_price_cents) / 100.0 if total_price_cents else 0
-        
-        shipping_cost_cents = order.get('total_shipping', 0)
-        shipping_cost = float(shipping_cost_cents) / 100.0 if shipping_cost_cents else 0
-
-        tax_cents = order.get('total_tax', 0)
-        tax = float(tax_cents) / 100.0 if tax_cents else 0
+        total_price = fields['total_price']
+        shipping_cost = fields['shipping_cost']
+        tax = fields['tax']
         
         # Calculate final price (total_price + total_shipping + total_tax)
         final_price = total_price + shipping_cost + tax
-        logger.debug(f"Order {order_id}: final_price calculation: {total_price} + {shipping_cost} + {tax} = {final_price}")
+        logger.debug("Order %s: final_price calculation: %s + %s + %s = %s", order_id, total_price, shipping_cost, tax, final_price, extra=ORDER_EVENT)
 
         # Convert created_at to datetime with fallback
-        created_at = order.get('created_at')
+        created_at = fields['created_at']
         if created_at:
             try:
                 order_date = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
             except (ValueError, AttributeError) as e:
-                logger.warning(f"Error parsing date for order {order_id}: {str(e)}")
+                logger.warning("Error parsing date for order %s: %s", order_id, e)
                 order_date = datetime.now()
         else:
             order_date = datetime.now()
@@ -196,13 +201,13 @@ class PrintifyCrawler(BaseCrawler):
             order_date=order_date,
             customer=customer,
             items=items,
-            subtotal=subtotal,
+            subtotal=fields['subtotal'],
             shipping_cost=shipping_cost,
             total_cost=total_price,
             final_price=final_price,
-            status=order.get('status', 'unknown'),
-            tracking_number=order.get('tracking_number'),
+            status=fields['status'],
+            tracking_number=fields['tracking_number'],
             raw_data=order
         )
         
-        return standardized_order 
\ No newline at end of file
+        return standardized_order
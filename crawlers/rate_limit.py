@@ -0,0 +1,60 @@
+"""
+Per-token request budgets shared by every crawler using the same API token.
+"""
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self) -> bool:
+        """Take a request slot if one is free right now, without waiting"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_token: str, rate: float, burst: Optional[int] = None) -> RateLimiter:
+    """Return the limiter shared by every crawler using `api_token`"""
+    # Key on a digest so raw tokens are not kept around as dict keys
+    key = hashlib.sha256(api_token.encode()).hexdigest()
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(rate, burst)
+            _limiters[key] = limiter
+        return limiter
@@ -0,0 +1,161 @@
+"""
+Recording and replay of raw API pages.
+
+With a PageRecorder attached, every page a crawler fetches through `_get` is
+saved as
+
+    {directory}/{platform}/{endpoint}/{page:06d}.json.gz
+
+holding the request URL and params, status code, response time and body. A
+PageReplayer attached instead serves those pages back in recorded order per
+endpoint, so a crawl runs with no network at disk speed (or, with
+simulate_latency, at the recorded response times).
+"""
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    # Type hints only: the crawl job imports this module and loads requests with the crawlers
+    import requests
+
+PAGE_SUFFIX = ".json.gz"
+
+
+def endpoint_name(url: str) -> str:
+    """Directory name of an endpoint, e.g. .../v1/shops/123/orders.json -> v1_shops_123_orders.json"""
+    path = urlparse(url).path.strip("/")
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", path) or "root"
+
+
+class PageRecorder:
+    """Writes every fetched page of a run under `directory`; safe across threads and processes"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._next_page: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, platform: str, url: str, params: Optional[dict], response: 'requests.Response'):
+        page = {
+            "url": url,
+            "params": params,
+            "status": response.status_code,
+            "elapsed": response.elapsed.total_seconds() if response.elapsed is not None else None,
+            "recorded_at": datetime.now().isoformat(),
+            "body": response.text,
+        }
+        content = gzip.compress(json.dumps(page).encode(), compresslevel=6)
+        endpoint = endpoint_name(url)
+        directory = os.path.join(self.directory, platform, endpoint)
+        os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            key = (platform, endpoint)
+            number = self._next_page.get(key)
+            if number is None:
+                number = len([name for name in os.listdir(directory) if name.endswith(PAGE_SUFFIX)])
+            while True:
+                # Exclusive create, so workers in other processes never overwrite each other's pages
+                try:
+                    fd = os.open(os.path.join(directory, f"{number:06d}{PAGE_SUFFIX}"),
+                                 os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                    break
+                except FileExistsError:
+                    number += 1
+            self._next_page[key] = number + 1
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+
+
+def read_page(path: str) -> dict:
+    with gzip.open(path, 'rb') as f:
+        return json.loads(f.read())
+
+
+def recorded_pages(directory: str, platform: str) -> Dict[str, List[str]]:
+    """Page files per endpoint of a platform, in recorded order"""
+    platform_dir = os.path.join(directory, platform)
+    if not os.path.isdir(platform_dir):
+        return {}
+    return {
+        endpoint: [os.path.join(platform_dir, endpoint, name)
+                   for name in sorted(os.listdir(os.path.join(platform_dir, endpoint))) if name.endswith(PAGE_SUFFIX)]
+        for endpoint in sorted(os.listdir(platform_dir))
+        if os.path.isdir(os.path.join(platform_dir, endpoint))
+    }
+
+
+class RecordedResponse:
+    """The parts of requests.Response the crawlers use, built from a recorded page"""
+
+    def __init__(self, page: dict):
+        self.url = page["url"]
+        self.status_code = page["status"]
+        self.text = page["body"]
+        self.content = self.text.encode()
+        self.headers: Dict[str, str] = {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error (recorded) for url: {self.url}", response=self)
+
+
+class ReplayExhausted(LookupError):
+    """Every recorded page of an endpoint has been served"""
+
+
+class PageReplayer:
+    """Serves recorded pages in order per (platform, endpoint), instead of the network"""
+
+    def __init__(self, directory: str, simulate_latency: bool = False):
+        self.directory = directory
+        self.simulate_latency = simulate_latency
+        self._pages: Dict[str, Dict[str, Iterator[str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, platform: str, url: str) -> RecordedResponse:
+        endpoint = endpoint_name(url)
+        with self._lock:
+            if platform not in self._pages:
+                self._pages[platform] = {name: iter(paths) for name, paths in recorded_pages(self.directory, platform).items()}
+            path = next(self._pages[platform].get(endpoint, iter(())), None)
+        if path is None:
+            raise ReplayExhausted(f"No more recorded {platform} pages for {endpoint}")
+        page = read_page(path)
+        if self.simulate_latency and page.get("elapsed"):
+            time.sleep(page["elapsed"])
+        return RecordedResponse(page)
+
+
+_recorders: Dict[str, PageRecorder] = {}
+_replayers: Dict[str, PageReplayer] = {}
+_shared_lock = threading.Lock()
+
+
+def get_page_recorder(directory: str) -> PageRecorder:
+    """Return the recorder shared by every crawler of this process writing to `directory`"""
+    with _shared_lock:
+        recorder = _recorders.get(directory)
+        if recorder is None:
+            recorder = _recorders[directory] = PageRecorder(directory)
+        return recorder
+
+
+def get_page_replayer(directory: str, simulate_latency: bool = False) -> PageReplayer:
+    """Return the replayer shared by every crawler of this process, so each page is served once"""
+    with _shared_lock:
+        replayer = _replayers.get(directory)
+        if replayer is None:
+            replayer = _replayers[directory] = PageReplayer(directory, simulate_latency)
+        return replayer
@@ -0,0 +1,46 @@
+"""
+Registry of platform crawlers.
+
+Platforms register by name with the import path of their crawler class. The
+crawler module (and `requests` with it) is only imported the first time a
+crawler for that platform is requested, so jobs that never crawl a platform
+never pay for its import.
+"""
+import importlib
+import threading
+from typing import Dict, List
+
+_registry: Dict[str, str] = {}
+_classes: Dict[str, type] = {}
+_lock = threading.Lock()
+
+
+def register(platform: str, target: str):
+    """Register a crawler class by import path, e.g. "crawlers.printful:PrintfulCrawler" """
+    with _lock:
+        _registry[platform] = target
+        _classes.pop(platform, None)
+
+
+def registered_platforms() -> List[str]:
+    return sorted(_registry)
+
+
+def get_crawler_class(platform: str) -> type:
+    """Import and return the crawler class registered for a platform"""
+    crawler_class = _classes.get(platform)
+    if crawler_class is not None:
+        return crawler_class
+    with _lock:
+        try:
+            target = _registry[platform]
+        except KeyError:
+            raise ValueError(f"No crawler registered for platform {platform!r}") from None
+        module_name, _, class_name = target.partition(":")
+        crawler_class = _classes[platform] = getattr(importlib.import_module(module_name), class_name)
+    return crawler_class
+
+
+register("printful", "crawlers.printful:PrintfulCrawler")
+register("printify", "crawlers.printify:PrintifyCrawler")
+register("burger_prints", "crawlers.burger_prints:BurgerPrintsCrawler")
@@ -2,103 +2,188 @@
 import os
 import json
 import csv
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from collections import defaultdict
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
+from dotenv import load_dotenv
+from storage.manifest import StorageManifest
+from storage.order_storage import OrderStorage, storage_roots
+
+# matplotlib and pandas take most of this script's start-up time, so they are
+# imported by the stages that use them rather than here
 
 def get_date_from_filename(filename):
     """Extract date from filename like 2025-03-26.json"""
     return filename.split('.')[0]
 
-def load_orders_from_dir(directory):
-    """Load all orders from JSON files in a directory"""
-    all_orders = []
-    if not os.path.exists(directory):
-        print(f"Directory not found: {directory}")
-        return all_orders
-    
-    for filename in os.listdir(directory):
-        if filename.endswith('.json'):
-            file_path = os.path.join(directory, filename)
-            try:
-                with open(file_path, 'r') as f:
-                    orders = json.load(f)
-                    if isinstance(orders, list):
-                        all_orders.extend(orders)
-                    else:
-                        print(f"Warning: {file_path} doesn't contain a list")
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-    
-    return all_orders
+CHART_COLORS = ['#3498db', '#e74c3c', '#2ecc71']
+PLATFORM_COLUMNS = ['printful_cost', 'printify_cost', 'burger_cost']
+FINGERPRINT_FILE = '.chart_fingerprints.json'
 
-def create_cost_plots(df, output_dir='reports'):
-    """Create visualizations of cost data"""
-    # Create output directory if it doesn't exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # Set the style
-    plt.style.use('ggplot')
-    
-    # 1. Daily costs stacked bar chart
-    plt.figure(figsize=(14, 8))
+def _use_headless_backend():
+    """Render without a display; safe to call in worker processes"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _pyplot():
+    _use_headless_backend()
+    import matplotlib.pyplot as plt
+    return plt
+
+def _render_daily_costs(records, path, max_bars=None):
+    """Stacked bar chart of daily costs, bucketed into N-day totals past max_bars"""
+    import pandas as pd
+    plt = _pyplot()
+    df = pd.DataFrame(records)
+    title = 'Daily Costs by Platform'
+    if max_bars and len(df) > max_bars:
+        bucket_days = -(-len(df) // max_bars)
+        df = df.groupby(df.index // bucket_days).agg(
+            {'date': 'first', **{column: 'sum' for column in PLATFORM_COLUMNS}}
+        )
+        title = f'Costs by Platform ({bucket_days}-Day Totals)'
+
+    fig, ax = plt.subplots(figsize=(14, 8))
     df.plot(
         x='date',
-        y=['printful_cost', 'printify_cost', 'burger_cost'],
+        y=PLATFORM_COLUMNS,
         kind='bar',
         stacked=True,
-        title='Daily Costs by Platform',
-        color=['#3498db', '#e74c3c', '#2ecc71'],
-        figsize=(14, 8)
+        title=title,
+        color=CHART_COLORS,
+        ax=ax
     )
-    plt.xlabel('Date')
-    plt.ylabel('Cost ($)')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/daily_costs_by_platform.png')
-    
-    # 2. Platform cost comparison pie chart
-    plt.figure(figsize=(10, 10))
-    platform_totals = [
-        df['printful_cost'].sum(),
-        df['printify_cost'].sum(),
-        df['burger_cost'].sum()
-    ]
-    plt.pie(
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Cost ($)')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def _render_platform_distribution(platform_totals, path, max_bars=None):
+    """Pie chart of each platform's share of the total cost"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.pie(
         platform_totals,
         labels=['Printful', 'Printify', 'Burger Prints'],
         autopct='%1.1f%%',
         startangle=90,
-        colors=['#3498db', '#e74c3c', '#2ecc71']
+        colors=CHART_COLORS
     )
-    plt.axis('equal')
-    plt.title('Cost Distribution by Platform')
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/platform_cost_distribution.png')
-    
-    # 3. Trend line for total costs
-    plt.figure(figsize=(14, 8))
-    # Convert date to datetime and sort
+    ax.axis('equal')
+    ax.set_title('Cost Distribution by Platform')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def _render_total_trend(records, path, max_bars=None):
+    """Daily total cost with a 7-day moving average"""
+    import pandas as pd
+    plt = _pyplot()
+    df = pd.DataFrame(records)
     df['date_dt'] = pd.to_datetime(df['date'])
     df = df.sort_values('date_dt')
     
     # Calculate 7-day moving average
     df['7day_avg'] = df['total'].rolling(window=7, min_periods=1).mean()
     
-    plt.plot(df['date_dt'], df['total'], marker='o', linestyle='-', color='#3498db', alpha=0.7, label='Daily Total')
-    plt.plot(df['date_dt'], df['7day_avg'], linestyle='-', linewidth=3, color='#e74c3c', label='7-Day Moving Avg')
+    fig, ax = plt.subplots(figsize=(14, 8))
+    # Markers stop being readable on long histories
+    marker = 'o' if not max_bars or len(df) <= max_bars else None
+    ax.plot(df['date_dt'], df['total'], marker=marker, linestyle='-', color='#3498db', alpha=0.7, label='Daily Total')
+    ax.plot(df['date_dt'], df['7day_avg'], linestyle='-', linewidth=3, color='#e74c3c', label='7-Day Moving Avg')
+    
+    ax.set_title('Daily Total Cost Trend')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Total Cost ($)')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def _render_chart(name, data, path, max_bars):
+    _pyplot().style.use('ggplot')
+    CHARTS[name](data, path, max_bars)
+    return name
+
+CHARTS = {
+    'daily_costs_by_platform': _render_daily_costs,
+    'platform_cost_distribution': _render_platform_distribution,
+    'total_cost_trend': _render_total_trend,
+}
+
+def _chart_inputs(df):
+    """The data each chart is drawn from; charts are redrawn only when it changes"""
+    records = df[['date', 'total'] + PLATFORM_COLUMNS].sort_values('date').to_dict('records')
+    platform_totals = [float(df[column].sum()) for column in PLATFORM_COLUMNS]
+    return {
+        'daily_costs_by_platform': records,
+        'platform_cost_distribution': platform_totals,
+        'total_cost_trend': records,
+    }
+
+def _fingerprint(name, data, fmt, max_bars):
+    payload = json.dumps([name, fmt, max_bars, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _load_fingerprints(output_dir):
+    try:
+        with open(os.path.join(output_dir, FINGERPRINT_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_fingerprints(output_dir, fingerprints):
+    path = os.path.join(output_dir, FINGERPRINT_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(fingerprints, f, indent=2)
+    os.replace(tmp_path, path)
+
+def create_cost_plots(df, output_dir='reports', fmt='png', max_bars=None, jobs=None, force=False):
+    """
+    Create visualizations of cost data.
+
+    Charts whose input data is unchanged since the last run are skipped. The rest
+    are rendered in parallel worker processes on the headless Agg backend.
+    Use fmt='svg' and/or max_bars to keep long histories cheap to draw.
+    """
+    # Create output directory if it doesn't exist
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
     
-    plt.title('Daily Total Cost Trend')
-    plt.xlabel('Date')
-    plt.ylabel('Total Cost ($)')
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/total_cost_trend.png')
+    fingerprints = _load_fingerprints(output_dir)
+    pending = []
+    for name, data in _chart_inputs(df).items():
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        fingerprint = _fingerprint(name, data, fmt, max_bars)
+        if not force and fingerprints.get(os.path.basename(path)) == fingerprint and os.path.exists(path):
+            print(f"Skipping {path}: data unchanged")
+            continue
+        pending.append((name, data, path, fingerprint))
+
+    if not pending:
+        print(f"Visualizations in {output_dir}/ are up to date")
+        return
+
+    workers = min(jobs or os.cpu_count() or 1, len(pending))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_use_headless_backend) as pool:
+            futures = [pool.submit(_render_chart, name, data, path, max_bars) for name, data, path, _ in pending]
+            for future in futures:
+                future.result()
+    else:
+        for name, data, path, _ in pending:
+            _render_chart(name, data, path, max_bars)
+
+    for _, _, path, fingerprint in pending:
+        fingerprints[os.path.basename(path)] = fingerprint
+    _save_fingerprints(output_dir, fingerprints)
     
     print(f"Visualizations saved to {output_dir}/ directory")
 
@@ -131,6 +216,7 @@ def analyze_data(df):
     if len(df) >= 7:
         # Convert date to datetime if it's not already
         if 'date_dt' not in df.columns:
+            import pandas as pd
             df['date_dt'] = pd.to_datetime(df['date'])
         
         # Get the most recent week
@@ -191,76 +277,104 @@ def generate_report(df, stats, output_dir='reports'):
     
     return report_file
 
+PLATFORM_COST_COLUMNS = {
+    "printful": "printful_cost",
+    "printify": "printify_cost",
+    "burger_prints": "burger_cost",
+}
+
+PLATFORM_LABELS = {
+    "printful": "Printful",
+    "printify": "Printify",
+    "burger_prints": "Burger Prints",
+}
+
+def load_daily_costs(base_dir):
+    """Sum final_price per date and platform by reading every order file, account partitions included"""
+    storage = OrderStorage(base_dir)
+    daily_costs = defaultdict(lambda: {"printful_cost": 0, "printify_cost": 0, "burger_cost": 0, "total": 0})
+
+    for platform, column in PLATFORM_COST_COLUMNS.items():
+        order_count = 0
+        for order in storage.query([platform], fields=["order_date", "final_price"]):
+            order_count += 1
+            # Get date part from order_date
+            date_str = order["order_date"].split(" ")[0] if order["order_date"] else None
+            if date_str:
+                final_price = float(order["final_price"] or 0)
+                daily_costs[date_str][column] += final_price
+                daily_costs[date_str]["total"] += final_price
+        print(f"Loaded {order_count} orders from {PLATFORM_LABELS[platform]}")
+
+    return daily_costs
+
+def load_daily_costs_from_manifest(base_dir):
+    """Sum final_price per date and platform from the storage manifests alone"""
+    daily_costs = defaultdict(lambda: {"printful_cost": 0, "printify_cost": 0, "burger_cost": 0, "total": 0})
+    roots = storage_roots(base_dir)
+    for root in roots:
+        for platform, date_str, stats in StorageManifest(root).partitions():
+            column = PLATFORM_COST_COLUMNS.get(platform)
+            if column:
+                daily_costs[date_str][column] += stats["final_price_sum"]
+                daily_costs[date_str]["total"] += stats["final_price_sum"]
+
+    print(f"Loaded {len(daily_costs)} days from {len(roots)} storage manifest(s)")
+    return daily_costs
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate cost reports from crawled orders")
+    parser.add_argument("--storage", default=None,
+                        help="Storage path, including its account partitions (default: STORAGE_PATH or data/orders)")
+    parser.add_argument("--format", choices=["png", "svg"], default="png",
+                        help="Chart output format (default: png)")
+    parser.add_argument("--max-bars", type=int, default=None,
+                        help="Bucket the daily bar chart into N-day totals beyond this many bars")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes used to render charts (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Redraw every chart even if its data is unchanged")
+    parser.add_argument("--from-manifest", action="store_true",
+                        help="Read daily totals from the storage manifest instead of the order files")
+    parser.add_argument("--csv-only", action="store_true",
+                        help="Only write the daily CSV; skips charts, analysis and the pandas/matplotlib imports")
+    return parser.parse_args()
+
 def main():
-    base_dir = "data/orders"
+    args = parse_args()
+    load_dotenv()
+    base_dir = args.storage or os.getenv('STORAGE_PATH', 'data/orders')
     output_dir = "reports"
     
-    # Define platform directories
-    printful_dir = os.path.join(base_dir, "printful")
-    printify_dir = os.path.join(base_dir, "printify")
-    burger_dir = os.path.join(base_dir, "burger_prints")
-    
-    # Load orders from each platform
-    printful_orders = load_orders_from_dir(printful_dir)
-    printify_orders = load_orders_from_dir(printify_dir)
-    burger_orders = load_orders_from_dir(burger_dir)
-    
-    print(f"Loaded {len(printful_orders)} orders from Printful")
-    print(f"Loaded {len(printify_orders)} orders from Printify")
-    print(f"Loaded {len(burger_orders)} orders from Burger Prints")
-    
-    # Group orders by date
-    daily_costs = defaultdict(lambda: {"printful_cost": 0, "printify_cost": 0, "burger_cost": 0, "total": 0})
-    
-    # Process Printful orders
-    for order in printful_orders:
-        # Get date part from order_date
-        date_str = order.get("order_date", "").split(" ")[0] if order.get("order_date") else None
-        if date_str:
-            final_price = float(order.get("final_price", 0))
-            daily_costs[date_str]["printful_cost"] += final_price
-            daily_costs[date_str]["total"] += final_price
-    
-    # Process Printify orders
-    for order in printify_orders:
-        date_str = order.get("order_date", "").split(" ")[0] if order.get("order_date") else None
-        if date_str:
-            final_price = float(order.get("final_price", 0))
-            daily_costs[date_str]["printify_cost"] += final_price
-            daily_costs[date_str]["total"] += final_price
-    
-    # Process Burger Prints orders
-    for order in burger_orders:
-        date_str = order.get("order_date", "").split(" ")[0] if order.get("order_date") else None
-        if date_str:
-            final_price = float(order.get("final_price", 0))
-            daily_costs[date_str]["burger_cost"] += final_price
-            daily_costs[date_str]["total"] += final_price
-    
-    # Convert to DataFrame for easier analysis
-    data = []
-    for date, costs in daily_costs.items():
-        row = {"date": date}
-        row.update(costs)
-        data.append(row)
-    
-    df = pd.DataFrame(data)
-    
-    # Sort by date
-    df = df.sort_values('date')
-    
-    # Create CSV file
-    output_file = os.path.join(output_dir, "daily_platform_costs.csv")
+    if args.from_manifest:
+        daily_costs = load_daily_costs_from_manifest(base_dir)
+    else:
+        daily_costs = load_daily_costs(base_dir)
     
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-        
-    df.to_csv(output_file, index=False)
+
+    # Create CSV file, one row per date
+    columns = ["printful_cost", "printify_cost", "burger_cost", "total"]
+    output_file = os.path.join(output_dir, "daily_platform_costs.csv")
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(["date"] + columns)
+        for date in sorted(daily_costs):
+            writer.writerow([date] + [float(daily_costs[date][column]) for column in columns])
     print(f"CSV report generated: {output_file}")
-    
+
+    if args.csv_only:
+        return
+
+    # Convert to DataFrame for easier analysis
+    import pandas as pd
+    df = pd.DataFrame([{"date": date, **costs} for date, costs in daily_costs.items()])
+    df = df.sort_values('date')
+
     # Generate visualizations
-    create_cost_plots(df, output_dir)
+    create_cost_plots(df, output_dir, fmt=args.format, max_bars=args.max_bars, jobs=args.jobs, force=args.force)
     
     # Analyze and report
     stats = analyze_data(df)
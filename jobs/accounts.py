@@ -0,0 +1,72 @@
+"""
+Account configuration for multi-store crawling.
+"""
+import json
+import os
+from typing import List
+from pydantic import BaseModel
+from crawlers.registry import registered_platforms
+
+PLATFORM_TOKEN_ENV = {
+    "printful": "PRINTFUL_API_TOKEN",
+    "printify": "PRINTIFY_API_TOKEN",
+    "burger_prints": "BURGER_PRINTS_API_TOKEN",
+}
+
+class Account(BaseModel):
+    name: str
+    platform: str  # printful, printify, or burger_prints
+    token: str
+    shop_ids: List[str] = []  # Printify only; empty means the first shop of the account
+    partition: str = ""  # Storage sub-directory, relative to STORAGE_PATH
+    requests_per_second: float = 2.0  # Budget shared by every account using this token
+
+def load_accounts(path: str) -> List[Account]:
+    """
+    Load accounts from a JSON config file.
+
+    The file holds either a list of accounts or an object with an "accounts" list.
+    A token written as "env:NAME" is read from the NAME environment variable.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    entries = data.get("accounts", []) if isinstance(data, dict) else data
+    accounts = []
+    for entry in entries:
+        token = entry.get("token", "")
+        if isinstance(token, str) and token.startswith("env:"):
+            entry = dict(entry, token=os.getenv(token[4:], ""))
+        account = Account(**entry)
+        if account.platform not in registered_platforms():
+            raise ValueError(f"Unknown platform '{account.platform}' for account {account.name}")
+        if not account.partition:
+            account.partition = account.name
+        accounts.append(account)
+    return accounts
+
+def accounts_from_env() -> List[Account]:
+    """Build one account per platform from the single-token environment variables"""
+    accounts = []
+    for platform, env_name in PLATFORM_TOKEN_ENV.items():
+        token = os.getenv(env_name)
+        if token:
+            accounts.append(Account(name=platform, platform=platform, token=token))
+    return accounts
+
+def fair_order(accounts: List[Account]) -> List[Account]:
+    """
+    Interleave accounts round-robin by token so a token with many stores
+    cannot occupy every worker while other tokens wait.
+    """
+    queues = {}
+    for account in accounts:
+        queues.setdefault(account.token, []).append(account)
+
+    ordered = []
+    while queues:
+        for token in list(queues):
+            ordered.append(queues[token].pop(0))
+            if not queues[token]:
+                del queues[token]
+    return ordered
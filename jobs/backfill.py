@@ -0,0 +1,141 @@
+"""
+Resumable parallel backfill of historical orders.
+
+    python -m jobs.backfill --platform printify --from 2023-01-01 --to 2025-03-31
+
+The range is split into day-aligned chunks that are crawled by a pool of workers.
+Progress is persisted per chunk, so re-running the same command after an
+interruption only crawls the chunks that have not completed.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from dotenv import load_dotenv
+from crawlers.registry import registered_platforms
+from jobs.logging_config import configure_logging
+from storage.files import atomic_write
+
+if TYPE_CHECKING:
+    from jobs.accounts import Account
+
+logger = logging.getLogger("pod_crawler.backfill")
+
+def split_range(start: datetime, end: datetime, chunk_days: int) -> List[Tuple[datetime, datetime]]:
+    """Split [start, end] into whole-day chunks, so no two chunks share a day partition"""
+    chunks = []
+    chunk_start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    last_day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    while chunk_start <= last_day:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last_day)
+        chunks.append((chunk_start, chunk_end.replace(hour=23, minute=59, second=59, microsecond=999999)))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+class BackfillProgress:
+    """Per-chunk status persisted as JSON, rewritten atomically after every chunk"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self.chunks: Dict[str, dict] = json.load(f).get("chunks", {})
+        except FileNotFoundError:
+            self.chunks = {}
+
+    @staticmethod
+    def key(account: 'Account', chunk_start: datetime) -> str:
+        return f"{account.name}|{chunk_start.strftime('%Y-%m-%d')}"
+
+    def is_done(self, key: str) -> bool:
+        return self.chunks.get(key, {}).get("status") == "done"
+
+    def mark(self, key: str, status: str, **details):
+        with self._lock:
+            self.chunks[key] = {"status": status, "updated_at": datetime.now().isoformat(), **details}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            atomic_write(self.path, json.dumps({"chunks": self.chunks}, indent=2, sort_keys=True).encode())
+
+def run_backfill(accounts: List['Account'], storage_path: str, start: datetime, end: datetime,
+                 chunk_days: int, workers: int, progress: BackfillProgress) -> bool:
+    """Crawl every pending (account, chunk); returns True when all chunks are done"""
+    from jobs.crawl_orders import crawl_account
+    chunks = split_range(start, end, chunk_days)
+    pending = [
+        (account, chunk_start, chunk_end)
+        for chunk_start, chunk_end in chunks
+        for account in accounts
+        if not progress.is_done(BackfillProgress.key(account, chunk_start))
+    ]
+    total = len(chunks) * len(accounts)
+    logger.info(f"Backfill: {total - len(pending)}/{total} chunks already done, {len(pending)} to crawl with {workers} workers")
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(crawl_account, account, storage_path, chunk_start, chunk_end): (account, chunk_start, chunk_end)
+            for account, chunk_start, chunk_end in pending
+        }
+        for future in as_completed(futures):
+            account, chunk_start, chunk_end = futures[future]
+            key = BackfillProgress.key(account, chunk_start)
+            try:
+                saved = future.result()
+                progress.mark(key, "done", orders=saved, end=chunk_end.strftime('%Y-%m-%d'))
+                logger.info(f"[{account.name}] Chunk {chunk_start.date()}..{chunk_end.date()}: saved {saved} orders")
+            except Exception as e:
+                failed += 1
+                progress.mark(key, "failed", error=str(e), end=chunk_end.strftime('%Y-%m-%d'))
+                logger.error(f"[{account.name}] Chunk {chunk_start.date()}..{chunk_end.date()} failed: {str(e)}", exc_info=True)
+
+    logger.info(f"Backfill finished: {len(pending) - failed} chunks crawled, {failed} failed")
+    return failed == 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill historical orders in resumable, parallel chunks")
+    parser.add_argument("--platform", required=True, choices=registered_platforms())
+    parser.add_argument("--from", dest="start", required=True, type=lambda s: datetime.strptime(s, "%Y-%m-%d"),
+                        help="First day to backfill (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", required=True, type=lambda s: datetime.strptime(s, "%Y-%m-%d"),
+                        help="Last day to backfill, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--account", action="append",
+                        help="Only backfill the named account(s) from ACCOUNTS_CONFIG")
+    parser.add_argument("--chunk-days", type=int, default=7, help="Days per chunk (default: 7)")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks crawled in parallel (default: 4)")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and crawl every chunk again")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    configure_logging()
+    storage_path = os.getenv('STORAGE_PATH', './data/orders')
+    # Imported after argument parsing so --help doesn't load the crawl stack
+    from jobs.crawl_orders import load_configured_accounts
+
+    accounts = [account for account in load_configured_accounts() if account.platform == args.platform]
+    if args.account:
+        accounts = [account for account in accounts if account.name in args.account]
+    if not accounts:
+        logger.error(f"No {args.platform} accounts configured")
+        return 1
+
+    progress_path = os.path.join(
+        storage_path, ".backfill",
+        f"{args.platform}_{args.start:%Y-%m-%d}_{args.end:%Y-%m-%d}_{args.chunk_days}d.json"
+    )
+    if args.restart and os.path.exists(progress_path):
+        os.remove(progress_path)
+    progress = BackfillProgress(progress_path)
+
+    ok = run_backfill(accounts, storage_path, args.start, args.end, args.chunk_days, args.workers, progress)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Roll closed day partitions into indexed monthly archives.
+
+    python -m jobs.compact --older-than 30
+
+Day files older than N days are merged into `{platform}/archive/{YYYY-MM}` archives
+and removed, in STORAGE_PATH and every account partition below it. OrderStorage
+and the cost report read both tiers transparently.
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from jobs.logging_config import configure_logging
+from storage.archive import compact_platform
+from storage.order_storage import OrderStorage, storage_roots
+
+logger = logging.getLogger("pod_crawler.compact")
+
+def compact_storage(storage: OrderStorage, older_than_days: int) -> int:
+    """
+    Archive every day partition older than `older_than_days`, in the storage and its
+    account partitions; returns the number of days archived
+    """
+    before = (datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d")
+    total = 0
+    for root in storage_roots(storage.base_path):
+        root_storage = storage if root == storage.base_path else OrderStorage(root)
+        for platform in root_storage.platforms():
+            platform_dir = os.path.join(root, platform)
+            days = compact_platform(platform_dir, before, root_storage.manifest.locked)
+            if not days:
+                continue
+            with root_storage.manifest.locked():
+                # Content is unchanged, only the tier it lives in; a day written again since
+                # is a day file once more and keeps its new statistics
+                manifest = root_storage.manifest.load().get("partitions", {}).get(platform, {})
+                root_storage.manifest.update_many({
+                    (platform, date_str): dict(manifest[date_str], tier="archive")
+                    for date_str in days
+                    if date_str in manifest and not os.path.exists(os.path.join(platform_dir, f"{date_str}.json"))
+                })
+            logger.info(f"Archived {len(days)} {platform} day files older than {before} in {root}")
+            total += len(days)
+    return total
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compact old day files into monthly archives")
+    parser.add_argument("--storage", default=None, help="Storage path (default: STORAGE_PATH)")
+    parser.add_argument("--older-than", type=int, default=30,
+                        help="Archive days older than this many days (default: 30)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    configure_logging()
+    storage = OrderStorage(args.storage or os.getenv('STORAGE_PATH', './data/orders'))
+    archived = compact_storage(storage, args.older_than)
+    logger.info(f"Compaction finished: {archived} day files archived")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,95 +2,173 @@ import os
 import logging
 import schedule
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from typing import Dict, Optional
 from dotenv import load_dotenv
-from crawlers.printful import PrintfulCrawler
-from crawlers.printify import PrintifyCrawler
-from crawlers.burger_prints import BurgerPrintsCrawler
+from crawlers.autotune import get_autotuner
+from crawlers.deadline import Deadline, DeadlineExceeded
+from crawlers.rate_limit import get_rate_limiter
+from crawlers.recording import get_page_recorder, get_page_replayer
+from crawlers.registry import get_crawler_class
+from jobs.accounts import Account, PLATFORM_TOKEN_ENV, accounts_from_env, fair_order, load_accounts
+from jobs.logging_config import configure_logging
 from storage.order_storage import OrderStorage
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("pod_crawler.log")
-    ]
-)
+from storage.writer import AsyncOrderWriter
 
 logger = logging.getLogger("pod_crawler")
 
+class PartialCrawl(DeadlineExceeded):
+    """The time budget ran out part way through an account; the `saved` orders fetched so far were saved"""
+
+    def __init__(self, message: str, saved: int):
+        super().__init__(message)
+        self.saved = saved
+
+def platform_deadlines(platforms, run_deadline: Deadline) -> Dict[str, Deadline]:
+    """
+    The run deadline narrowed by PLATFORM_BUDGET_SECONDS, e.g. "printful=600,burger_prints=300",
+    so one slow platform can't use up the whole run
+    """
+    budgets = {}
+    for entry in os.getenv('PLATFORM_BUDGET_SECONDS', '').split(','):
+        if entry.strip():
+            platform, _, seconds = entry.partition('=')
+            budgets[platform.strip()] = float(seconds)
+    return {platform: run_deadline.within(budgets.get(platform), platform) for platform in platforms}
+
+def build_crawler(account: Account):
+    """Create the platform crawler for an account, sharing the token's rate budget"""
+    rate_limiter = get_rate_limiter(account.token, account.requests_per_second)
+    return get_crawler_class(account.platform)(account.token, rate_limiter=rate_limiter)
+
+def crawl_account(account: Account, storage_path: str, start_date: datetime, end_date: datetime,
+                  writer: Optional[AsyncOrderWriter] = None, deadline: Optional[Deadline] = None) -> int:
+    """
+    Fetch one account's orders and save them to the account's storage partition,
+    through `writer` when given so the crawl thread doesn't wait on disk.
+    Raises PartialCrawl, after saving, when `deadline` cut the crawl short.
+    """
+    track_changes = os.getenv('TRACK_CHANGES', 'false').lower() in ('1', 'true', 'yes')
+    storage = OrderStorage(os.path.join(storage_path, account.partition), track_changes=track_changes)
+    crawler = build_crawler(account)
+    crawler.fingerprints = storage.fingerprints
+    if os.getenv('REPLAY_PAGES'):
+        # Serve previously recorded API pages instead of calling the APIs
+        simulate_latency = os.getenv('REPLAY_LATENCY', 'false').lower() in ('1', 'true', 'yes')
+        crawler.replayer = get_page_replayer(os.getenv('REPLAY_PAGES'), simulate_latency)
+    elif os.getenv('RECORD_PAGES'):
+        crawler.recorder = get_page_recorder(os.getenv('RECORD_PAGES'))
+    if not crawler.replayer and os.getenv('AUTOTUNE', 'true').lower() in ('1', 'true', 'yes'):
+        crawler.autotuner = get_autotuner(type(crawler))
+    if deadline is not None:
+        crawler.deadline = deadline
+    if os.getenv('REQUEST_TIMEOUT'):
+        crawler.request_timeout = float(os.getenv('REQUEST_TIMEOUT'))
+    if os.getenv('HEDGE_PERCENTILE'):
+        # e.g. 95; 0 turns hedging off
+        crawler.hedge_percentile = float(os.getenv('HEDGE_PERCENTILE')) / 100 or None
+
+    if account.platform == "printify":
+        # Will automatically get the first shop ID when none are configured
+        shop_ids = account.shop_ids or [crawler.get_shop_id()]
+        orders = []
+        for shop_id in shop_ids:
+            crawler.set_shop_id(shop_id)
+            logger.info(f"[{account.name}] Fetching orders for shop {shop_id} from {start_date} to {end_date}")
+            orders.extend(crawler.get_orders(start_date, end_date))
+            if crawler.truncated:
+                break
+    else:
+        logger.info(f"[{account.name}] Fetching {account.platform} orders from {start_date} to {end_date}")
+        orders = crawler.get_orders(start_date, end_date)
+
+    # A partial crawl may hold only part of its last day; merge so stored orders of that day are kept
+    if writer:
+        writer.submit(storage, orders, account.platform, merge=crawler.truncated)
+    else:
+        storage.save_orders(orders, account.platform, merge=crawler.truncated)
+    if crawler.truncated:
+        raise PartialCrawl(f"{crawler.deadline.name} time budget exhausted", len(orders))
+    return len(orders)
+
+def load_configured_accounts():
+    """Read accounts from ACCOUNTS_CONFIG, falling back to the single-token env vars"""
+    config_path = os.getenv('ACCOUNTS_CONFIG')
+    if config_path:
+        logger.info(f"Loading accounts from {config_path}")
+        return load_accounts(config_path)
+
+    accounts = accounts_from_env()
+    configured = {account.platform for account in accounts}
+    for platform, env_name in PLATFORM_TOKEN_ENV.items():
+        if platform not in configured:
+            logger.warning(f"{env_name} not found, skipping {platform} orders")
+    return accounts
+
 def crawl_orders():
     logger.info("Starting order crawl job")
     
     # Load environment variables
     load_dotenv()
     
-    # Initialize storage
     storage_path = os.getenv('STORAGE_PATH', './data/orders')
     logger.info(f"Using storage path: {storage_path}")
-    storage = OrderStorage(storage_path)
 
     # Get yesterday's date range
     start_date, end_date = get_yesterday_range()
     logger.info(f"Fetching orders from {start_date} to {end_date}")
 
-    # Process Printful orders
     try:
-        printful_token = os.getenv('PRINTFUL_API_TOKEN')
-        if not printful_token:
-            logger.warning("Printful API token not found, skipping Printful orders")
-        else:
-            logger.info("Fetching Printful orders")
-            printful_crawler = PrintfulCrawler(printful_token)
-            printful_orders = printful_crawler.get_orders(start_date, end_date)
-            storage.save_orders(printful_orders, "printful")
-            logger.info(f"Saved {len(printful_orders)} Printful orders")
+        accounts = load_configured_accounts()
     except Exception as e:
-        logger.error(f"Error fetching Printful orders: {str(e)}")
+        logger.error(f"Error loading accounts: {str(e)}", exc_info=True)
+        return
 
-    # Process Printify orders
-    try:
-        printify_token = os.getenv('PRINTIFY_API_TOKEN')
-        if not printify_token:
-            logger.warning("Printify API token not found, skipping Printify orders")
-        else:
-            logger.info("Fetching Printify orders")
-            printify_crawler = PrintifyCrawler(printify_token)
-            
-            # Will automatically get the first shop ID
+    max_workers = int(os.getenv('CRAWL_WORKERS', '4'))
+    logger.info(f"Crawling {len(accounts)} accounts with {max_workers} workers")
+
+    started = time.monotonic()
+    run_budget = os.getenv('RUN_BUDGET_SECONDS')
+    deadlines = platform_deadlines(
+        {account.platform for account in accounts}, Deadline.after(float(run_budget) if run_budget else None)
+    )
+    summary = {account.name: {"platform": account.platform, "orders": 0, "error": None, "partial": False}
+               for account in accounts}
+    writer = AsyncOrderWriter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(crawl_account, account, storage_path, start_date, end_date, writer,
+                        deadlines[account.platform]): account
+            for account in fair_order(accounts)
+        }
+        for future in as_completed(futures):
+            account = futures[future]
             try:
-                logger.info("Attempting to fetch shop list from Printify")
-                shop_id = printify_crawler.get_shop_id()
-                logger.info(f"Successfully retrieved shop ID: {shop_id}")
-                
-                logger.info(f"Fetching orders for shop {shop_id} from {start_date} to {end_date}")
-                printify_orders = printify_crawler.get_orders(start_date, end_date)
-                logger.info(f"Retrieved {len(printify_orders)} orders from Printify")
-                
-                storage.save_orders(printify_orders, "printify")
-                logger.info(f"Saved {len(printify_orders)} Printify orders to {storage_path}/printify/")
+                summary[account.name]["orders"] = future.result()
+            except PartialCrawl as e:
+                summary[account.name].update(orders=e.saved, partial=True)
+                logger.warning("[%s] %s: saved %s %s orders fetched so far", account.name, e, e.saved, account.platform)
             except Exception as e:
-                logger.error(f"Error with Printify shop: {str(e)}", exc_info=True)
-    except Exception as e:
-        logger.error(f"Error fetching Printify orders: {str(e)}", exc_info=True)
+                summary[account.name]["error"] = str(e)
+                logger.error("[%s] Error fetching %s orders: %s", account.name, account.platform, e, exc_info=True)
 
-    # Process Burger Prints orders
+    save_error = None
     try:
-        burger_prints_token = os.getenv('BURGER_PRINTS_API_TOKEN')
-        if not burger_prints_token:
-            logger.warning("Burger Prints API token not found, skipping Burger Prints orders")
-        else:
-            logger.info("Fetching Burger Prints orders")
-            burger_prints_crawler = BurgerPrintsCrawler(burger_prints_token)
-            burger_prints_orders = burger_prints_crawler.get_orders(start_date, end_date)
-            storage.save_orders(burger_prints_orders, "burger_prints")
-            logger.info(f"Saved {len(burger_prints_orders)} Burger Prints orders")
+        writer.close()
     except Exception as e:
-        logger.error(f"Error fetching Burger Prints orders: {str(e)}")
+        save_error = str(e)
+        logger.error("Error saving orders: %s", e, exc_info=True)
 
-    logger.info("Order crawl job completed")
+    # One structured record for the whole run instead of a line per account
+    errors = sum(1 for result in summary.values() if result["error"])
+    partial = sum(1 for result in summary.values() if result["partial"])
+    logger.info(
+        "Order crawl job completed: %s orders from %s accounts, %s failed, %s partial, in %.1fs",
+        sum(result["orders"] for result in summary.values()), len(summary), errors, partial, time.monotonic() - started,
+        extra={"event": "run.summary", "accounts": summary, "failed": errors, "partial": partial,
+               "save_error": save_error, "duration_seconds": round(time.monotonic() - started, 3)}
+    )
 
 def get_yesterday_range():
     """Helper method to get yesterday's date range"""
@@ -100,6 +178,8 @@ def get_yesterday_range():
     return start_date, end_date
 
 def main():
+    load_dotenv()
+    configure_logging()
     # For testing purposes, just run once and exit
     logger.info("Running single crawler job for testing")
     crawl_orders()
@@ -0,0 +1,49 @@
+"""
+Product and SKU cost analytics from the item cost cube.
+
+    python -m jobs.item_analytics top --n 10 --by quantity --from 2025-01-01
+    python -m jobs.item_analytics sku --platform printify
+    python -m jobs.item_analytics providers
+"""
+import argparse
+import json
+import os
+import sys
+from dotenv import load_dotenv
+from storage.cube import ItemCostCube
+from storage.order_storage import OrderStorage
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query item-level costs by product, SKU and provider")
+    parser.add_argument("command", choices=["sync", "top", "sku", "providers"])
+    parser.add_argument("--storage", default=None, help="Storage path (default: STORAGE_PATH)")
+    parser.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", help="Last day, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--platform", action="append", help="Only include these platforms")
+    parser.add_argument("--n", type=int, default=10, help="Number of products for 'top' (default: 10)")
+    parser.add_argument("--by", choices=["cost", "quantity", "count"], default="cost")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    storage = OrderStorage(args.storage or os.getenv('STORAGE_PATH', './data/orders'))
+
+    cube = ItemCostCube(storage)
+    changed = cube.sync()
+    if args.command == "sync":
+        print(f"Item cube updated from {changed} changed partitions")
+        return 0
+
+    filters = {"start": args.start, "end": args.end, "platforms": args.platform}
+    if args.command == "top":
+        result = cube.top_products(args.n, by=args.by, **filters)
+    elif args.command == "sku":
+        result = cube.cost_per_sku(**filters)
+    else:
+        result = cube.provider_breakdown(**filters)
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Logging setup for the job scripts.
+
+Records are handed to a QueueHandler and written by a background QueueListener,
+so crawl threads never block on the log file. Messages are formatted lazily on
+the listener thread, and per-order events (records logged with
+`extra=ORDER_EVENT`) are sampled so only a fraction of them reach the handlers.
+
+Environment:
+    LOG_LEVEL        INFO (default), DEBUG, ...
+    LOG_FORMAT       text (default) or json for one structured record per line
+    LOG_SAMPLE_RATE  fraction of per-order events kept (default: 0.01)
+    LOG_FILE         log file path (default: pod_crawler.log)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any fields passed through `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != "sampled":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every record except per-order events, of which one in 1/rate is kept"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        if not self.every:
+            return False
+        with self._lock:
+            self._count += 1
+            return self._count % self.every == 1 or self.every == 1
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread. The stock handler
+    formats every record in the calling thread before enqueueing it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                      sample_rate: Optional[float] = None, log_file: Optional[str] = None):
+    """Route the root logger through a sampled, non-blocking queue to stderr and the log file"""
+    global _listener, _listener_pid
+    # A forked child inherits the queue handler but not the listener thread, so it sets up its own
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    log_format = log_format or os.getenv('LOG_FORMAT', 'text')
+    sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '0.01')) if sample_rate is None else sample_rate
+    log_file = log_file or os.getenv('LOG_FILE', 'pod_crawler.log')
+
+    formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(), logging.FileHandler(log_file)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener = None
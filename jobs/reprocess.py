@@ -0,0 +1,191 @@
+"""
+Re-standardize stored orders from their raw_data after a conversion fix.
+
+    python -m jobs.reprocess --platform printify --workers 8
+
+Every stored record keeps the raw API payload in `raw_data`, so history can be
+fixed without calling the APIs: partitions are streamed to a process pool,
+each record is re-run through the platform crawler's `_convert_to_standardized`,
+and a partition is rewritten only if at least one record changed. Progress is
+kept per partition, so an interrupted run resumes where it stopped. STORAGE_PATH
+and every account partition below it are reprocessed.
+
+Records are rewritten in the partition they are stored in; a fix that changes
+an order's date does not move it to another day file. With TRACK_CHANGES on,
+every rewritten order is appended to the change log with kind "reprocessed",
+so consumers of the deltas pick up the corrected records too.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from crawlers.registry import get_crawler_class, registered_platforms
+from jobs.backfill import BackfillProgress
+from jobs.logging_config import configure_logging
+from storage.fingerprints import fingerprint
+from storage.order_storage import DateLike, OrderStorage, storage_roots
+
+logger = logging.getLogger("pod_crawler.reprocess")
+
+_crawlers = {}
+
+def _normalize(record: dict) -> dict:
+    # Stored records went through json.dumps(default=str); compare in that form
+    return json.loads(json.dumps(record, default=str))
+
+def reprocess_partition(base_path: str, platform: str, date_str: str, dry_run: bool = False,
+                        track_changes: bool = False) -> Tuple[int, int, int, Optional[str]]:
+    """
+    Re-convert one partition and rewrite it if any record changed.
+    Returns (records, changed, failed, first error); records that fail to convert are kept as stored.
+
+    The partition is converted without holding the manifest lock, then re-read under
+    it; if a crawl rewrote the day meanwhile, it is converted again under the lock,
+    so orders saved in between are never overwritten with their older version.
+    """
+    storage = OrderStorage(base_path, track_changes=track_changes)
+    result = _reprocess_content(storage, platform, date_str, dry_run)
+    if result is None:
+        with storage.manifest.locked():
+            result = _reprocess_content(storage, platform, date_str, dry_run)
+    return result
+
+def _reprocess_content(storage: OrderStorage, platform: str, date_str: str,
+                       dry_run: bool) -> Optional[Tuple[int, int, int, Optional[str]]]:
+    """
+    Re-convert the stored records of a partition and rewrite it if any changed;
+    None when its content on disk changed since it was read
+    """
+    content = storage.read_partition_bytes(platform, date_str)
+    if content is None:
+        raise FileNotFoundError(f"No {platform} partition for {date_str} in {storage.base_path}")
+    records = json.loads(content)
+    crawler = _crawlers.get(platform)
+    if crawler is None:
+        # Conversion needs no token; one crawler per platform and worker process
+        crawler = _crawlers[platform] = get_crawler_class(platform)("reprocess")
+
+    changed = failed = 0
+    first_error = None
+    updated = []
+    changes, details = {}, {}
+    for record in records:
+        raw = record.get("raw_data")
+        if not isinstance(raw, dict):
+            updated.append(record)
+            continue
+        try:
+            new_record = _normalize(crawler._convert_to_standardized(raw).model_dump())
+        except Exception as e:
+            failed += 1
+            # Reported by the parent process, whose log handlers outlive the pool
+            first_error = first_error or f"order {record.get('order_id')}: {e}"
+            updated.append(record)
+            continue
+        if new_record != record:
+            changed += 1
+            order_id = str(new_record.get("order_id"))
+            # The raw order is the same, so its fingerprint is too; only the log entry is new
+            changes[order_id] = ("reprocessed", fingerprint(raw))
+            details[order_id] = {"date": date_str, "status": new_record.get("status"),
+                                 "tracking_number": new_record.get("tracking_number")}
+        updated.append(new_record)
+
+    if changed and not dry_run:
+        with storage.manifest.locked():
+            # Re-entrant: already held when called from the second, locked attempt
+            if storage.read_partition_bytes(platform, date_str) != content:
+                return None
+            storage.replace_partition(platform, date_str, updated)
+        if storage.fingerprints is not None:
+            storage.fingerprints.commit(platform, changes, details)
+    return len(records), changed, failed, first_error
+
+def reprocess(storage: OrderStorage, progress: BackfillProgress, platforms: Optional[List[str]] = None,
+              start: DateLike = None, end: DateLike = None, workers: Optional[int] = None,
+              dry_run: bool = False, track_changes: bool = False) -> dict:
+    """
+    Reprocess every pending partition of the storage and its account partitions in a
+    process pool; returns totals
+    """
+    pending = []
+    for root in storage_roots(storage.base_path):
+        root_storage = storage if root == storage.base_path else OrderStorage(root)
+        # Progress keys of account partitions are prefixed with their directory
+        prefix = os.path.relpath(root, storage.base_path) + "/" if root != storage.base_path else ""
+        root_platforms = [platform for platform in (platforms or root_storage.platforms())
+                          if platform in registered_platforms()]
+        pending.extend(
+            (root, platform, date_str, f"{prefix}{platform}/{date_str}")
+            for platform, date_str in root_storage.partitions(root_platforms, start, end)
+            if not progress.is_done(f"{prefix}{platform}/{date_str}")
+        )
+    logger.info("Reprocessing %s partitions with %s workers", len(pending), workers or os.cpu_count())
+
+    totals = {"partitions": 0, "rewritten": 0, "records": 0, "changed": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(reprocess_partition, root, platform, date_str, dry_run, track_changes): key
+            for root, platform, date_str, key in pending
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                records, changed, failed, first_error = future.result()
+            except Exception as e:
+                progress.mark(key, "failed", error=str(e))
+                logger.error("Reprocessing %s failed: %s", key, e, exc_info=True)
+                continue
+            if not dry_run:
+                progress.mark(key, "done", records=records, changed=changed, failed=failed)
+            totals["partitions"] += 1
+            totals["rewritten"] += 1 if changed else 0
+            totals["records"] += records
+            totals["changed"] += changed
+            totals["failed"] += failed
+            if changed:
+                logger.info("%s: %s of %s records changed", key, changed, records)
+            if failed:
+                logger.warning("%s: %s records could not be re-converted, e.g. %s", key, failed, first_error)
+    return totals
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run order conversion on stored raw_data")
+    parser.add_argument("--storage", default=None, help="Storage path (default: STORAGE_PATH)")
+    parser.add_argument("--platform", action="append", choices=registered_platforms(),
+                        help="Only reprocess these platforms")
+    parser.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", help="Last day, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore saved progress, e.g. after another conversion fix")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    configure_logging()
+    storage = OrderStorage(args.storage or os.getenv('STORAGE_PATH', './data/orders'))
+
+    progress_path = os.path.join(storage.base_path, ".reprocess", "progress.json")
+    if args.restart and os.path.exists(progress_path):
+        os.remove(progress_path)
+    progress = BackfillProgress(progress_path)
+
+    track_changes = os.getenv('TRACK_CHANGES', 'false').lower() in ('1', 'true', 'yes')
+    totals = reprocess(storage, progress, args.platform, args.start, args.end, args.workers, args.dry_run,
+                       track_changes)
+    logger.info(
+        "Reprocessing finished: %s of %s records changed in %s of %s partitions, %s failed",
+        totals["changed"], totals["records"], totals["rewritten"], totals["partitions"], totals["failed"],
+        extra={"event": "reprocess.summary", **totals}
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Crawl coordination through a shared SQLite work queue.
+
+A planner enqueues (account, platform, date-shard) tasks; any number of worker
+processes, on one host or on several hosts sharing the volume, claim tasks with
+time-limited leases, crawl them and write through OrderStorage. Tasks whose
+lease expires (e.g. the worker died) are handed out again, up to max_attempts.
+
+    python -m jobs.work_queue plan --queue queue.db --from 2024-01-01 --to 2024-12-31
+    python -m jobs.work_queue work --queue queue.db --processes 4
+    python -m jobs.work_queue status --queue queue.db
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from jobs.backfill import split_range
+from jobs.logging_config import configure_logging, stop_logging
+
+if TYPE_CHECKING:
+    from jobs.accounts import Account
+
+logger = logging.getLogger("pod_crawler.work_queue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    shard_start TEXT NOT NULL,
+    shard_end TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    orders INTEGER,
+    last_error TEXT,
+    updated_at REAL,
+    UNIQUE (account, platform, shard_start, shard_end)
+)
+"""
+
+class WorkQueue:
+    """
+    Task table in a SQLite file. Status moves pending -> leased -> done, or back to
+    pending on failure/lease expiry until max_attempts, then failed.
+
+    Uses SQLite's default rollback journal rather than WAL, because WAL needs
+    shared memory and does not work for hosts sharing a network volume.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def enqueue(self, tasks: Iterable[Tuple[str, str, datetime, datetime]]) -> int:
+        """Add (account, platform, shard_start, shard_end) tasks; already planned shards are ignored"""
+        now = time.time()
+        with self._transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (account, platform, shard_start, shard_end, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(account, platform, start.isoformat(), end.isoformat(), now) for account, platform, start, end in tasks]
+            )
+            return self._conn.total_changes - before
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[sqlite3.Row]:
+        """Lease the oldest available task, including tasks whose lease expired"""
+        now = time.time()
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_owner = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = self._conn.execute(
+                "SELECT id FROM tasks WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"])
+            )
+            return self._conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone()
+
+    def renew(self, task_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False means the lease was lost to another worker"""
+        now = time.time()
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + lease_seconds, now, task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str, orders: int):
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE tasks SET status = 'done', orders = ?, lease_owner = NULL, last_error = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (orders, time.time(), task_id, worker_id)
+            )
+
+    def fail(self, task_id: int, worker_id: str, error: str):
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, last_error = ?, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (self.max_attempts, error, time.time(), task_id, worker_id)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so claims are serialized across processes"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+def plan(queue: WorkQueue, accounts: List['Account'], start: datetime, end: datetime, shard_days: int) -> int:
+    """Enqueue one task per account and date shard"""
+    tasks = [
+        (account.name, account.platform, shard_start, shard_end)
+        for shard_start, shard_end in split_range(start, end, shard_days)
+        for account in accounts
+    ]
+    return queue.enqueue(tasks)
+
+def run_worker(queue_path: str, storage_path: str, lease_seconds: float = 300, poll_seconds: float = 0):
+    """
+    Claim and crawl tasks until the queue has nothing left to claim. With
+    poll_seconds > 0, keep polling for new tasks instead of exiting.
+    """
+    from jobs.crawl_orders import crawl_account, load_configured_accounts
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(queue_path)
+    accounts = {account.name: account for account in load_configured_accounts()}
+    processed = 0
+
+    while True:
+        task = queue.claim(worker_id, lease_seconds)
+        if task is None:
+            if poll_seconds > 0:
+                time.sleep(poll_seconds)
+                continue
+            break
+
+        label = f"{task['account']} {task['shard_start'][:10]}..{task['shard_end'][:10]}"
+        account = accounts.get(task["account"])
+        if account is None:
+            queue.fail(task["id"], worker_id, f"Account {task['account']} is not configured on {worker_id}")
+            logger.error(f"Task {task['id']} ({label}): account not configured on this worker")
+            continue
+
+        # Keep the lease alive while the crawl runs
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat, args=(queue_path, task["id"], worker_id, lease_seconds, stop_heartbeat), daemon=True
+        )
+        heartbeat.start()
+        try:
+            saved = crawl_account(
+                account, storage_path,
+                datetime.fromisoformat(task["shard_start"]), datetime.fromisoformat(task["shard_end"])
+            )
+            queue.complete(task["id"], worker_id, saved)
+            logger.info(f"Task {task['id']} ({label}): saved {saved} orders")
+        except Exception as e:
+            queue.fail(task["id"], worker_id, str(e))
+            logger.error(f"Task {task['id']} ({label}) failed on attempt {task['attempts']}: {str(e)}", exc_info=True)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        processed += 1
+
+    queue.close()
+    logger.info(f"Worker {worker_id} finished after {processed} tasks")
+
+def _worker_process(*worker_args):
+    # Child processes exit without running atexit hooks, so flush the log queue explicitly
+    configure_logging()
+    try:
+        run_worker(*worker_args)
+    finally:
+        stop_logging()
+
+def _heartbeat(queue_path: str, task_id: int, worker_id: str, lease_seconds: float, stop: threading.Event):
+    # SQLite connections can't be shared across threads, so the heartbeat opens its own
+    queue = WorkQueue(queue_path)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.renew(task_id, worker_id, lease_seconds):
+                logger.warning(f"Lost lease on task {task_id}")
+                return
+    finally:
+        queue.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl through a shared SQLite work queue")
+    parser.add_argument("--queue", required=True, help="Path of the SQLite queue file (shared by all workers)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="Enqueue crawl tasks")
+    plan_parser.add_argument("--from", dest="start", required=True, type=lambda s: datetime.strptime(s, "%Y-%m-%d"))
+    plan_parser.add_argument("--to", dest="end", required=True, type=lambda s: datetime.strptime(s, "%Y-%m-%d"))
+    plan_parser.add_argument("--shard-days", type=int, default=1, help="Days per task (default: 1)")
+    plan_parser.add_argument("--platform", action="append", help="Only plan these platforms")
+    plan_parser.add_argument("--account", action="append", help="Only plan these accounts")
+
+    work_parser = commands.add_parser("work", help="Claim and run tasks")
+    work_parser.add_argument("--processes", type=int, default=1, help="Worker processes on this host (default: 1)")
+    work_parser.add_argument("--lease-seconds", type=float, default=300)
+    work_parser.add_argument("--poll-seconds", type=float, default=0,
+                             help="Keep polling for new tasks at this interval instead of exiting when idle")
+
+    commands.add_parser("status", help="Show task counts by status")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    configure_logging()
+    storage_path = os.getenv('STORAGE_PATH', './data/orders')
+
+    if args.command == "plan":
+        # Imported after argument parsing so --help and status don't load the crawl stack
+        from jobs.crawl_orders import load_configured_accounts
+        accounts = load_configured_accounts()
+        if args.platform:
+            accounts = [account for account in accounts if account.platform in args.platform]
+        if args.account:
+            accounts = [account for account in accounts if account.name in args.account]
+        queue = WorkQueue(args.queue)
+        added = plan(queue, accounts, args.start, args.end, args.shard_days)
+        logger.info(f"Enqueued {added} tasks for {len(accounts)} accounts")
+        queue.close()
+    elif args.command == "work":
+        worker_args = (args.queue, storage_path, args.lease_seconds, args.poll_seconds)
+        if args.processes <= 1:
+            run_worker(*worker_args)
+        else:
+            processes = [multiprocessing.Process(target=_worker_process, args=worker_args) for _ in range(args.processes)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+    else:
+        queue = WorkQueue(args.queue)
+        print(queue.counts())
+        queue.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
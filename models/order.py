@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel
 
 class Customer(BaseModel):
@@ -17,6 +17,10 @@ class OrderItem(BaseModel):
     variant: Optional[str] = None
     size: Optional[str] = None
     color: Optional[str] = None
+    sku: Optional[str] = None
+    product_id: Optional[Union[str, int]] = None
+    variant_id: Optional[Union[str, int]] = None
+    print_provider_id: Optional[Union[str, int]] = None
 
 class StandardizedOrder(BaseModel):
     platform: str  # printful, printify, or burger_prints
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Long-lived cost report service.
+
+    python report_server.py --port 8050
+
+Daily and per-platform cost aggregates are built once from the storage
+manifests (of STORAGE_PATH and of every account partition below it) and kept in
+memory; a background thread polls the manifests and folds in only the
+partitions whose content changed. Queries are answered from
+prefix sums over the sorted days, so they don't touch the order files:
+
+    GET /api/status
+    GET /api/summary?from=2025-01-01&to=2025-03-31
+    GET /api/daily?from=...&to=...&platform=printify
+    GET /api/platforms?from=...&to=...
+    GET /api/rolling?window=7&from=...&to=...
+    GET /charts/total_cost_trend.png?from=...&to=...&max_bars=90
+
+Charts are the ones drawn by generate_cost_report.py, rendered on first request
+and cached until the data they were drawn from changes.
+"""
+import argparse
+import bisect
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from dotenv import load_dotenv
+from generate_cost_report import CHARTS, PLATFORM_COLUMNS, PLATFORM_COST_COLUMNS, _render_chart
+from jobs.logging_config import configure_logging
+from storage.manifest import StorageManifest
+from storage.order_storage import storage_roots
+
+logger = logging.getLogger("pod_crawler.report_server")
+
+CHART_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+class DailyIndex:
+    """
+    Immutable per-day cost table with prefix sums, so any date range is summed
+    in O(log n). Replaced as a whole when partitions change, so readers never
+    see a half-updated table.
+    """
+
+    def __init__(self, daily: Dict[str, Dict[str, Tuple[float, int]]], version: int):
+        self.version = version
+        self.dates = sorted(daily)
+        self.costs = {column: [daily[date_str].get(platform, (0.0, 0))[0] for date_str in self.dates]
+                      for platform, column in PLATFORM_COST_COLUMNS.items()}
+        self.costs["total"] = [sum(values) for values in zip(*(self.costs[column] for column in PLATFORM_COLUMNS))]
+        self.orders = [sum(count for _, count in daily[date_str].values()) for date_str in self.dates]
+        self._prefix = {name: self._prefix_sums(values) for name, values in self.costs.items()}
+        self._prefix["orders"] = self._prefix_sums(self.orders)
+
+    @staticmethod
+    def _prefix_sums(values: List[float]) -> List[float]:
+        sums = [0.0]
+        for value in values:
+            sums.append(sums[-1] + value)
+        return sums
+
+    def bounds(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """Row range [i, j) of the days within start..end (inclusive, YYYY-MM-DD)"""
+        i = bisect.bisect_left(self.dates, start) if start else 0
+        j = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return i, max(i, j)
+
+    def sum(self, name: str, i: int, j: int) -> float:
+        prefix = self._prefix[name]
+        return prefix[j] - prefix[i]
+
+    def daily(self, start=None, end=None) -> List[dict]:
+        i, j = self.bounds(start, end)
+        return [
+            {"date": self.dates[row], **{column: round(self.costs[column][row], 2) for column in PLATFORM_COLUMNS},
+             "total": round(self.costs["total"][row], 2), "orders": self.orders[row]}
+            for row in range(i, j)
+        ]
+
+    def platforms(self, start=None, end=None) -> Dict[str, dict]:
+        i, j = self.bounds(start, end)
+        total = self.sum("total", i, j)
+        return {
+            platform: {
+                "cost": round(self.sum(column, i, j), 2),
+                "pct": round(self.sum(column, i, j) / total * 100, 2) if total else 0.0,
+            }
+            for platform, column in PLATFORM_COST_COLUMNS.items()
+        }
+
+    def rolling(self, window: int, start=None, end=None) -> List[dict]:
+        """Daily total with its moving average over the last `window` days with data, like the report's 7-day trend"""
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        i, j = self.bounds(start, end)
+        prefix = self._prefix["total"]
+        rows = []
+        for row in range(i, j):
+            first = max(0, row - window + 1)
+            rows.append({
+                "date": self.dates[row],
+                "total": round(self.costs["total"][row], 2),
+                "avg": round((prefix[row + 1] - prefix[first]) / (row + 1 - first), 2),
+            })
+        return rows
+
+    def summary(self, start=None, end=None) -> dict:
+        i, j = self.bounds(start, end)
+        days = j - i
+        total = self.sum("total", i, j)
+        summary = {
+            "from": self.dates[i] if days else None,
+            "to": self.dates[j - 1] if days else None,
+            "total_days": days,
+            "total_cost": round(total, 2),
+            "avg_daily_cost": round(total / days, 2) if days else 0.0,
+            "order_count": int(self.sum("orders", i, j)),
+            "platforms": self.platforms(start, end),
+        }
+        if days:
+            totals = self.costs["total"]
+            max_row = max(range(i, j), key=totals.__getitem__)
+            min_row = min(range(i, j), key=totals.__getitem__)
+            summary.update(
+                max_daily_cost=round(totals[max_row], 2), max_cost_date=self.dates[max_row],
+                min_daily_cost=round(totals[min_row], 2), min_cost_date=self.dates[min_row],
+            )
+        return summary
+
+    def chart_inputs(self, start=None, end=None) -> Dict[str, object]:
+        """The same inputs generate_cost_report.py draws its charts from"""
+        records = [{key: row[key] for key in ["date", "total"] + PLATFORM_COLUMNS} for row in self.daily(start, end)]
+        i, j = self.bounds(start, end)
+        platform_totals = [self.sum(column, i, j) for column in PLATFORM_COLUMNS]
+        return {
+            'daily_costs_by_platform': records,
+            'platform_cost_distribution': platform_totals,
+            'total_cost_trend': records,
+        }
+
+
+class CostAggregates:
+    """Daily per-platform costs from the storage manifests under `base_dir`, refreshed incrementally"""
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        # (final_price sum, order count) per (storage root, platform, date)
+        self._partitions: Dict[Tuple[str, str, str], Tuple[float, int]] = {}
+        self._digests: Dict[Tuple[str, str, str], str] = {}
+        self._manifest_versions: Optional[Dict[str, Optional[int]]] = None
+        self._refresh_lock = threading.Lock()
+        self.index = DailyIndex({}, 0)
+        self.refreshed_at: Optional[float] = None
+
+    def refresh(self) -> int:
+        """Fold in partitions changed since the last refresh; returns how many changed"""
+        with self._refresh_lock:
+            # Roots are listed on every refresh, so a newly added account partition is picked up
+            manifests = {root: StorageManifest(root) for root in storage_roots(self.base_dir)}
+            manifest_versions = {}
+            for root, manifest in manifests.items():
+                try:
+                    manifest_versions[root] = os.stat(manifest.path).st_mtime_ns
+                except FileNotFoundError:
+                    manifest_versions[root] = None
+            if manifest_versions == self._manifest_versions:
+                return 0
+
+            seen = set()
+            changed = 0
+            for root, manifest in manifests.items():
+                for platform, days in manifest.load().get("partitions", {}).items():
+                    if platform not in PLATFORM_COST_COLUMNS:
+                        continue
+                    for date_str, stats in days.items():
+                        key = (root, platform, date_str)
+                        seen.add(key)
+                        if self._digests.get(key) == stats.get("sha256"):
+                            continue
+                        self._digests[key] = stats.get("sha256")
+                        self._partitions[key] = (stats["final_price_sum"], stats["order_count"])
+                        changed += 1
+            for key in set(self._digests) - seen:
+                del self._digests[key]
+                del self._partitions[key]
+                changed += 1
+
+            self._manifest_versions = manifest_versions
+            self.refreshed_at = time.time()
+            if changed:
+                # Account partitions holding the same platform and day add up
+                daily: Dict[str, Dict[str, Tuple[float, int]]] = {}
+                for (_, platform, date_str), (cost, count) in self._partitions.items():
+                    total_cost, total_count = daily.setdefault(date_str, {}).get(platform, (0.0, 0))
+                    daily[date_str][platform] = (total_cost + cost, total_count + count)
+                self.index = DailyIndex(daily, self.index.version + 1)
+                logger.info("Folded in %s changed partitions (%s days)", changed, len(self.index.dates))
+            return changed
+
+    def watch(self, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Refreshing aggregates failed: %s", e, exc_info=True)
+
+
+class ChartCache:
+    """Rendered charts keyed by chart, format, range and data version; least recently used are dropped"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        # pyplot keeps global state, so charts are drawn one at a time
+        self._render_lock = threading.Lock()
+
+    def get(self, index: DailyIndex, name: str, fmt: str, start=None, end=None, max_bars=None) -> bytes:
+        key = (name, fmt, start, end, max_bars, index.version)
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                return content
+
+        with self._render_lock:
+            directory = tempfile.mkdtemp(prefix="pod_chart_")
+            try:
+                path = os.path.join(directory, f"{name}.{fmt}")
+                _render_chart(name, index.chart_inputs(start, end)[name], path, max_bars)
+                with open(path, 'rb') as f:
+                    content = f.read()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        with self._lock:
+            self._entries[key] = content
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return content
+
+
+class ReportHandler(BaseHTTPRequestHandler):
+    aggregates: CostAggregates = None
+    charts: ChartCache = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        start, end = query.get("from"), query.get("to")
+        index = self.aggregates.index
+        try:
+            if url.path.startswith("/charts/"):
+                name, _, fmt = url.path[len("/charts/"):].partition(".")
+                if name not in CHARTS or fmt not in CHART_TYPES:
+                    return self._send_json({"error": f"Unknown chart {url.path}"}, 404)
+                max_bars = int(query["max_bars"]) if query.get("max_bars") else None
+                i, j = index.bounds(start, end)
+                if i == j:
+                    return self._send_json({"error": "No cost data in the requested range"}, 404)
+                return self._send(self.charts.get(index, name, fmt, start, end, max_bars), CHART_TYPES[fmt])
+
+            if url.path == "/api/status":
+                result = {"days": len(index.dates), "version": index.version,
+                          "refreshed_at": self.aggregates.refreshed_at}
+            elif url.path == "/api/summary":
+                result = index.summary(start, end)
+            elif url.path == "/api/daily":
+                rows = index.daily(start, end)
+                platforms = parse_qs(url.query).get("platform")
+                if platforms:
+                    columns = [PLATFORM_COST_COLUMNS[platform] for platform in platforms if platform in PLATFORM_COST_COLUMNS]
+                    rows = [{"date": row["date"], **{column: row[column] for column in columns},
+                             "total": round(sum(row[column] for column in columns), 2)} for row in rows]
+                result = rows
+            elif url.path == "/api/platforms":
+                result = index.platforms(start, end)
+            elif url.path == "/api/rolling":
+                result = index.rolling(int(query.get("window", 7)), start, end)
+            else:
+                return self._send_json({"error": f"Unknown path {url.path}"}, 404)
+        except ValueError as e:
+            return self._send_json({"error": str(e)}, 400)
+        except Exception as e:
+            logger.error("Error serving %s: %s", self.path, e, exc_info=True)
+            return self._send_json({"error": "Internal server error"}, 500)
+        self._send_json(result)
+
+    def _send_json(self, payload, status: int = 200):
+        self._send(json.dumps(payload).encode(), "application/json", status)
+
+    def _send(self, content: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve cost reports from in-memory aggregates")
+    parser.add_argument("--storage", default=None, help="Storage path (default: STORAGE_PATH)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--poll", type=float, default=2.0,
+                        help="Seconds between checks of the storage manifest for changes (default: 2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    configure_logging()
+
+    aggregates = CostAggregates(args.storage or os.getenv('STORAGE_PATH', './data/orders'))
+    aggregates.refresh()
+    stop = threading.Event()
+    threading.Thread(target=aggregates.watch, args=(args.poll, stop), daemon=True).start()
+
+    ReportHandler.aggregates = aggregates
+    ReportHandler.charts = ChartCache()
+    server = ThreadingHTTPServer((args.host, args.port), ReportHandler)
+    logger.info("Serving cost reports on http://%s:%s (%s days loaded)", args.host, args.port, len(aggregates.index.dates))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
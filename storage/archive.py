@@ -0,0 +1,160 @@
+"""
+Monthly archives of closed day partitions.
+
+Old `{platform}/{YYYY-MM-DD}.json` files are rolled into one archive per month:
+
+    {platform}/archive/{YYYY-MM}.idx.json       index: day -> (offset, length), order_id -> day
+    {platform}/archive/{YYYY-MM}.{digest}.pack  independently zlib-compressed day blocks
+
+Each day is compressed on its own, so a single day (or the day holding an order)
+is read with one seek and one decompress. The pack name changes with its content
+and the index is switched atomically, so readers never see an index pointing into
+a half-written pack.
+"""
+import hashlib
+import json
+import os
+import zlib
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional
+from .files import atomic_write
+
+ARCHIVE_DIR = "archive"
+INDEX_SUFFIX = ".idx.json"
+
+
+class MonthlyArchive:
+    def __init__(self, platform_dir: str, month: str):
+        self.directory = os.path.join(platform_dir, ARCHIVE_DIR)
+        self.month = month
+        self.index_path = os.path.join(self.directory, f"{month}{INDEX_SUFFIX}")
+        self._index: Optional[dict] = None
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r') as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = {"pack": None, "days": {}, "orders": {}}
+        return self._index
+
+    @property
+    def pack_path(self) -> Optional[str]:
+        pack = self.index["pack"]
+        return os.path.join(self.directory, pack) if pack else None
+
+    def days(self) -> List[str]:
+        return sorted(self.index["days"])
+
+    def read_day_bytes(self, date_str: str) -> Optional[bytes]:
+        """The original day file content, or None if the day is not archived"""
+        for attempt in range(2):
+            entry = self.index["days"].get(date_str)
+            if entry is None:
+                return None
+            try:
+                with open(self.pack_path, 'rb') as f:
+                    f.seek(entry["offset"])
+                    return zlib.decompress(f.read(entry["length"]))
+            except FileNotFoundError:
+                # The archive was rewritten since the index was loaded; reload it once
+                if attempt:
+                    raise
+                self._index = None
+
+    def read_day(self, date_str: str) -> List[dict]:
+        content = self.read_day_bytes(date_str)
+        return json.loads(content) if content is not None else []
+
+    def read_order(self, order_id: str) -> Optional[dict]:
+        date_str = self.index["orders"].get(str(order_id))
+        if date_str is None:
+            return None
+        for record in self.read_day(date_str):
+            if str(record.get("order_id")) == str(order_id):
+                return record
+        return None
+
+    def write(self, new_days: Dict[str, bytes]):
+        """Merge day file contents into the archive (new content wins) and publish it"""
+        days = {date_str: self.read_day_bytes(date_str) for date_str in self.days()}
+        days.update(new_days)
+
+        blocks, entries, orders = [], {}, {}
+        offset = 0
+        for date_str in sorted(days):
+            content = days[date_str]
+            block = zlib.compress(content, 6)
+            entries[date_str] = {
+                "offset": offset,
+                "length": len(block),
+                "bytes": len(content),
+                "sha256": hashlib.sha256(content).hexdigest(),
+            }
+            for record in json.loads(content):
+                orders[str(record.get("order_id"))] = date_str
+            blocks.append(block)
+            offset += len(block)
+
+        pack_content = b"".join(blocks)
+        pack_name = f"{self.month}.{hashlib.sha256(pack_content).hexdigest()[:12]}.pack"
+        os.makedirs(self.directory, exist_ok=True)
+        old_pack = self.pack_path
+
+        atomic_write(os.path.join(self.directory, pack_name), pack_content)
+        atomic_write(self.index_path, json.dumps({"pack": pack_name, "days": entries, "orders": orders}).encode())
+        self._index = None
+        if old_pack and os.path.basename(old_pack) != pack_name and os.path.exists(old_pack):
+            os.remove(old_pack)
+
+
+def archived_days(platform_dir: str) -> Dict[str, MonthlyArchive]:
+    """Map every archived day of a platform directory to its monthly archive"""
+    directory = os.path.join(platform_dir, ARCHIVE_DIR)
+    if not os.path.isdir(directory):
+        return {}
+    days = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(INDEX_SUFFIX):
+            archive = MonthlyArchive(platform_dir, filename[:-len(INDEX_SUFFIX)])
+            for date_str in archive.days():
+                days[date_str] = archive
+    return days
+
+
+def compact_platform(platform_dir: str, before: str,
+                     locked: Optional[Callable[[], ContextManager]] = None) -> List[str]:
+    """
+    Roll the day files of `platform_dir` dated before `before` (YYYY-MM-DD) into
+    monthly archives, then delete them. Returns the archived days.
+
+    `locked` (e.g. StorageManifest.locked) is held while a day file is compared
+    with its archived copy and deleted, so a writer holding the same lock can't
+    replace the file in between.
+    """
+    by_month: Dict[str, Dict[str, bytes]] = {}
+    for filename in sorted(os.listdir(platform_dir)):
+        if not filename.endswith('.json'):
+            continue
+        date_str = filename[:-len('.json')]
+        if date_str >= before:
+            continue
+        with open(os.path.join(platform_dir, filename), 'rb') as f:
+            by_month.setdefault(date_str[:7], {})[date_str] = f.read()
+
+    compacted = []
+    for month, days in sorted(by_month.items()):
+        MonthlyArchive(platform_dir, month).write(days)
+        # Only delete day files once the archive holding them is published, and keep
+        # any file rewritten meanwhile: a day file always shadows its archived copy
+        with locked() if locked else nullcontext():
+            for date_str, content in days.items():
+                filepath = os.path.join(platform_dir, f"{date_str}.json")
+                with open(filepath, 'rb') as f:
+                    unchanged = f.read() == content
+                if unchanged:
+                    os.remove(filepath)
+                    compacted.append(date_str)
+    return compacted
@@ -0,0 +1,237 @@
+"""
+Precomputed item-level cost cube over stored orders.
+"""
+import hashlib
+import json
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .files import atomic_write
+from .order_storage import DateLike, OrderStorage, _date_key
+
+CUBE_FILE = "item_cube.json"
+CUBE_DATA_FILE = "item_cube.bin"
+
+# Dimensions of a cube cell, in key order
+DIMENSIONS = ("date", "platform", "product", "sku", "variant", "provider")
+MEASURES = ("count", "quantity", "cost")
+
+
+def _item_rows(record: dict) -> Iterator[Tuple[Tuple[str, ...], int, float]]:
+    """
+    (product, sku, variant, provider), quantity and cost of each item of a stored order.
+
+    Orders stored before items carried sku/provider fall back to the raw payload,
+    whose line items map one to one onto the stored items for Printify and Burger Prints.
+    """
+    items = record.get("items") or []
+    raw = record.get("raw_data") or {}
+    raw_items = raw.get("line_items") or raw.get("items") or []
+    if len(raw_items) != len(items):
+        raw_items = [{}] * len(items)
+
+    for item, raw_item in zip(items, raw_items):
+        raw_item = raw_item if isinstance(raw_item, dict) else {}
+        metadata = raw_item.get("metadata") if isinstance(raw_item.get("metadata"), dict) else {}
+        sku = item.get("sku") or metadata.get("sku") or raw_item.get("catalog_sku") or ""
+        provider = item.get("print_provider_id") or raw_item.get("print_provider_id") or ""
+        variant = item.get("variant") or " / ".join(v for v in (item.get("color"), item.get("size")) if v)
+        quantity = int(item.get("quantity") or 0)
+        cost = float(item.get("price") or 0) * quantity
+        yield (item.get("product_name") or "", str(sku), variant or "", str(provider)), quantity, cost
+
+
+class ItemCostCube:
+    """
+    Counts, quantities and costs of order items per date x platform x product x
+    SKU x variant x print provider.
+
+    Dimension values are dictionary-encoded and every column is a typed `array`,
+    so the cube is compact on disk and scanned in milliseconds. `sync` keeps it
+    up to date incrementally: only partitions whose content changed since the
+    last sync (per the storage manifest) are re-read.
+
+    Each account partition below the storage (see storage_roots) keeps a cube of
+    its own next to its data; queries add up the results of all of them.
+    """
+
+    def __init__(self, storage: OrderStorage):
+        self.storage = storage
+        self.path = os.path.join(storage.base_path, CUBE_FILE)
+        self.data_path = os.path.join(storage.base_path, CUBE_DATA_FILE)
+        self._accounts: Dict[str, 'ItemCostCube'] = {}
+        self._reset()
+        self._load()
+
+    def accounts(self) -> List['ItemCostCube']:
+        """Cubes of the account partitions below this storage"""
+        for account in self.storage.accounts():
+            if account.base_path not in self._accounts:
+                self._accounts[account.base_path] = ItemCostCube(account)
+        return list(self._accounts.values())
+
+    def _reset(self):
+        self.values: Dict[str, List[str]] = {dimension: [] for dimension in DIMENSIONS}
+        self._codes: Dict[str, Dict[str, int]] = {dimension: {} for dimension in DIMENSIONS}
+        self.columns: Dict[str, array] = {dimension: array('i') for dimension in DIMENSIONS}
+        self.columns["count"] = array('i')
+        self.columns["quantity"] = array('q')
+        self.columns["cost"] = array('d')
+        self.partitions: Dict[str, str] = {}
+        self._rows: Dict[Tuple[int, ...], int] = {}
+        self._partition_rows: Dict[Tuple[int, int], List[int]] = {}
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                meta = json.load(f)
+            with open(self.data_path, 'rb') as f:
+                content = f.read()
+            # The two files are replaced one after the other; a crash in between pairs
+            # the metadata with the other save's columns
+            if hashlib.sha256(content).hexdigest() != meta["data_sha256"]:
+                raise ValueError("cube data does not match its metadata")
+            offset = 0
+            for name in DIMENSIONS + MEASURES:
+                size = meta["rows"] * self.columns[name].itemsize
+                self.columns[name].frombytes(content[offset:offset + size])
+                offset += size
+            if offset != len(content):
+                raise ValueError("cube data size does not match its row count")
+        except (FileNotFoundError, EOFError, ValueError, KeyError):
+            # Missing or torn cube files: start over, the next sync rebuilds it
+            self._reset()
+            return
+
+        self.values = meta["values"]
+        self._codes = {dimension: {value: code for code, value in enumerate(values)}
+                       for dimension, values in self.values.items()}
+        self.partitions = meta["partitions"]
+        for row in range(meta["rows"]):
+            key = tuple(self.columns[dimension][row] for dimension in DIMENSIONS)
+            self._rows[key] = row
+            self._partition_rows.setdefault(key[:2], []).append(row)
+
+    def save(self):
+        content = b"".join(self.columns[name].tobytes() for name in DIMENSIONS + MEASURES)
+        atomic_write(self.data_path, content)
+        meta = {"rows": len(self.columns["cost"]), "values": self.values, "partitions": self.partitions,
+                "data_sha256": hashlib.sha256(content).hexdigest()}
+        atomic_write(self.path, json.dumps(meta).encode())
+
+    def _code(self, dimension: str, value: str) -> int:
+        codes = self._codes[dimension]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values[dimension])
+            self.values[dimension].append(value)
+        return code
+
+    def sync(self) -> int:
+        """
+        Fold in partitions that changed since the last sync, in this storage and its
+        account partitions; returns how many were re-read
+        """
+        changed = sum(account.sync() for account in self.accounts())
+        manifest = self.storage.manifest.load().get("partitions", {})
+        own = 0
+        for platform, date_str in self.storage.partitions():
+            stats = manifest.get(platform, {}).get(date_str)
+            version = stats["sha256"] if stats else self.storage.partition_version(platform, date_str)
+            key = f"{platform}/{date_str}"
+            if self.partitions.get(key) == version:
+                continue
+            self._replace_partition(platform, date_str, self.storage.read_partition(platform, date_str))
+            self.partitions[key] = version
+            own += 1
+        if own:
+            self.save()
+        return changed + own
+
+    def _replace_partition(self, platform: str, date_str: str, records: Iterable[dict]):
+        date_code, platform_code = self._code("date", date_str), self._code("platform", platform)
+        count, quantity, cost = self.columns["count"], self.columns["quantity"], self.columns["cost"]
+        # Cells of a partition only ever receive that partition's items, so zeroing them drops its old contribution
+        for row in self._partition_rows.get((date_code, platform_code), ()):
+            count[row], quantity[row], cost[row] = 0, 0, 0.0
+
+        for record in records:
+            for (product, sku, variant, provider), item_quantity, item_cost in _item_rows(record):
+                key = (date_code, platform_code, self._code("product", product), self._code("sku", sku),
+                       self._code("variant", variant), self._code("provider", provider))
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._rows[key] = len(cost)
+                    for dimension, code in zip(DIMENSIONS, key):
+                        self.columns[dimension].append(code)
+                    count.append(0)
+                    quantity.append(0)
+                    cost.append(0.0)
+                    self._partition_rows.setdefault((date_code, platform_code), []).append(row)
+                count[row] += 1
+                quantity[row] += item_quantity
+                cost[row] += item_cost
+
+    def group_by(self, dimensions: Iterable[str], start: DateLike = None, end: DateLike = None,
+                 platforms: Optional[Iterable[str]] = None) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """Sum the measures per combination of `dimensions`, within the date range and platforms"""
+        dimensions = tuple(dimensions)
+        platforms = set(platforms) if platforms is not None else None
+        totals = self._totals(dimensions, start, end, platforms)
+        for account in self.accounts():
+            for key, (count, quantity, cost) in account._totals(dimensions, start, end, platforms).items():
+                total = totals.setdefault(key, [0, 0, 0.0])
+                total[0] += count
+                total[1] += quantity
+                total[2] += cost
+        return {key: {"count": total[0], "quantity": total[1], "cost": round(total[2], 2)}
+                for key, total in totals.items()}
+
+    def _totals(self, dimensions: Tuple[str, ...], start: DateLike, end: DateLike,
+                platforms: Optional[set]) -> Dict[Tuple[str, ...], List[float]]:
+        """[count, quantity, cost] per combination of dimension values, of this cube's own rows"""
+        start_key, end_key = _date_key(start), _date_key(end)
+        date_ok = bytearray(
+            (start_key is None or value >= start_key) and (end_key is None or value <= end_key)
+            for value in self.values["date"]
+        )
+        platform_ok = bytearray(platforms is None or value in platforms for value in self.values["platform"])
+
+        dates, platform_codes = self.columns["date"], self.columns["platform"]
+        group_columns = [self.columns[dimension] for dimension in dimensions]
+        count, quantity, cost = self.columns["count"], self.columns["quantity"], self.columns["cost"]
+        totals: Dict[Tuple[int, ...], List[float]] = {}
+        for row in range(len(cost)):
+            if not (date_ok[dates[row]] and platform_ok[platform_codes[row]]) or not count[row]:
+                continue
+            key = tuple(column[row] for column in group_columns)
+            total = totals.get(key)
+            if total is None:
+                total = totals[key] = [0, 0, 0.0]
+            total[0] += count[row]
+            total[1] += quantity[row]
+            total[2] += cost[row]
+
+        return {
+            tuple(self.values[dimension][code] for dimension, code in zip(dimensions, key)): total
+            for key, total in totals.items()
+        }
+
+    def top_products(self, n: int = 10, by: str = "cost", **filters) -> List[dict]:
+        """The n products with the highest cost (or quantity/count)"""
+        groups = self.group_by(("product",), **filters)
+        ranked = sorted(groups.items(), key=lambda item: item[1][by], reverse=True)[:n]
+        return [{"product": key[0], **totals} for key, totals in ranked]
+
+    def cost_per_sku(self, **filters) -> Dict[str, dict]:
+        """Total and average unit cost per SKU"""
+        result = {}
+        for (sku,), totals in self.group_by(("sku",), **filters).items():
+            unit_cost = round(totals["cost"] / totals["quantity"], 2) if totals["quantity"] else 0.0
+            result[sku] = {**totals, "unit_cost": unit_cost}
+        return result
+
+    def provider_breakdown(self, **filters) -> Dict[str, dict]:
+        """Totals per platform and print provider"""
+        return {f"{platform}:{provider}": totals
+                for (platform, provider), totals in self.group_by(("platform", "provider"), **filters).items()}
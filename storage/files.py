@@ -0,0 +1,37 @@
+"""
+File helpers shared by the storage modules.
+"""
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Write `data` to `path` so readers see either the old or the new file, never
+    a truncated one: write a temp file in the same directory, fsync, then rename.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive advisory lock on `path`, held across processes sharing the volume"""
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,113 @@
+"""
+Per-order fingerprints used to skip re-converting and re-writing unchanged orders.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+from .files import atomic_write, file_lock
+
+FINGERPRINT_FILE = "fingerprints.json"
+CHANGE_LOG_FILE = "changes.jsonl"
+
+
+def fingerprint(raw: dict) -> str:
+    """Stable hash of a raw platform order, independent of key order"""
+    payload = json.dumps(raw, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class FingerprintIndex:
+    """
+    fingerprints.json maps (platform, order_id) to the fingerprint of the raw order
+    last written. Every new or changed order is appended to changes.jsonl as
+
+        {"seq": 42, "platform": "printify", "order_id": "...", "kind": "changed", ...}
+
+    so downstream consumers can process only the deltas after the last seq they saw.
+    """
+
+    def __init__(self, base_path: str):
+        self.path = os.path.join(base_path, FINGERPRINT_FILE)
+        self.change_log_path = os.path.join(base_path, CHANGE_LOG_FILE)
+        self._lock_path = f"{self.path}.lock"
+        self._lock = threading.Lock()
+        self._data: Optional[dict] = None
+
+    def _load(self) -> dict:
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {"seq": 0, "orders": {}}
+        return self._data
+
+    def is_unchanged(self, platform: str, order_id: str, raw: dict) -> bool:
+        with self._lock:
+            known = self._load()["orders"].get(platform, {}).get(str(order_id))
+        return known is not None and known == fingerprint(raw)
+
+    def diff(self, platform: str, raw_orders: Dict[str, dict]) -> Dict[str, Tuple[str, str]]:
+        """
+        order_id -> (kind, fingerprint) for the orders that are new or changed;
+        unchanged orders are left out
+        """
+        with self._lock:
+            known = self._load()["orders"].get(platform, {})
+        changes = {}
+        for order_id, raw in raw_orders.items():
+            digest = fingerprint(raw)
+            previous = known.get(order_id)
+            if previous != digest:
+                changes[order_id] = ("new" if previous is None else "changed", digest)
+        return changes
+
+    def commit(self, platform: str, changes: Dict[str, Tuple[str, str]], details: Dict[str, dict] = None):
+        """Store the new fingerprints and append the changes to the change log"""
+        if not changes:
+            return
+        details = details or {}
+        with self._lock, file_lock(self._lock_path):
+            # Re-read under the file lock in case another process committed meanwhile
+            self._data = None
+            data = self._load()
+            known = data["orders"].setdefault(platform, {})
+            recorded_at = datetime.now().isoformat()
+            lines = []
+            for order_id, (kind, digest) in changes.items():
+                known[order_id] = digest
+                data["seq"] += 1
+                lines.append(json.dumps({
+                    "seq": data["seq"],
+                    "platform": platform,
+                    "order_id": order_id,
+                    "kind": kind,
+                    "fingerprint": digest,
+                    "recorded_at": recorded_at,
+                    **details.get(order_id, {}),
+                }, default=str))
+
+            with open(self.change_log_path, 'a') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            atomic_write(self.path, json.dumps(data, separators=(',', ':')).encode())
+
+    def read_changes(self, after_seq: int = 0, platform: Optional[str] = None) -> Iterator[dict]:
+        """Change log entries with seq > after_seq, oldest first"""
+        if not os.path.exists(self.change_log_path):
+            return
+        with open(self.change_log_path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["seq"] > after_seq and (platform is None or entry["platform"] == platform):
+                    yield entry
+
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._load()["seq"]
@@ -0,0 +1,129 @@
+"""
+Index of the partitions written by OrderStorage.
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from .files import atomic_write, file_lock
+
+MANIFEST_FILE = "manifest.json"
+
+SUM_FIELDS = ("final_price", "total_cost", "shipping_cost")
+
+
+def partition_stats(records: List[dict], content: bytes) -> dict:
+    """Statistics for one platform/date partition, from its records and file content"""
+    stats = {
+        "order_count": len(records),
+        "first_order_at": None,
+        "last_order_at": None,
+        "bytes": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "updated_at": datetime.now().isoformat(),
+    }
+    for field in SUM_FIELDS:
+        stats[f"{field}_sum"] = sum(float(record.get(field) or 0) for record in records)
+
+    # Timestamps are compared in the same string form they are stored in
+    timestamps = [str(record["order_date"]) for record in records if record.get("order_date")]
+    if timestamps:
+        stats["first_order_at"] = min(timestamps)
+        stats["last_order_at"] = max(timestamps)
+    return stats
+
+
+class StorageManifest:
+    """
+    manifest.json at the storage root, holding per-partition statistics:
+
+        {"partitions": {"printify": {"2025-03-26": {"order_count": 12, ...}}}}
+
+    Updates are read-modify-write under a file lock and replace the file
+    atomically, so concurrent writers and readers never see a partial manifest.
+    Writers hold the same lock (`locked()`) around writing a partition and
+    recording its statistics, so the manifest always describes the file on disk.
+    """
+
+    def __init__(self, base_path: str):
+        self.path = os.path.join(base_path, MANIFEST_FILE)
+        self._lock_path = f"{self.path}.lock"
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def locked(self):
+        """Exclusive access to the manifest across threads and processes; re-entrant within a thread"""
+        with self._lock:
+            self._depth += 1
+            try:
+                if self._depth > 1:
+                    yield
+                else:
+                    with file_lock(self._lock_path):
+                        yield
+            finally:
+                self._depth -= 1
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"partitions": {}}
+
+    def update(self, platform: str, date_str: str, stats: dict):
+        """Record the statistics of one partition"""
+        self.update_many({(platform, date_str): stats})
+
+    def update_many(self, updates: Dict[Tuple[str, str], dict]):
+        """Record the statistics of several partitions in one manifest write"""
+        with self.locked():
+            manifest = self.load()
+            partitions = manifest.setdefault("partitions", {})
+            for (platform, date_str), stats in updates.items():
+                partitions.setdefault(platform, {})[date_str] = stats
+            manifest["updated_at"] = datetime.now().isoformat()
+            atomic_write(self.path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    def partitions(self, platform: Optional[str] = None) -> Iterator[Tuple[str, str, dict]]:
+        """Yield (platform, date, stats) for every partition, in date order"""
+        partitions = self.load().get("partitions", {})
+        platforms = [platform] if platform else sorted(partitions)
+        for name in platforms:
+            for date_str, stats in sorted(partitions.get(name, {}).items()):
+                yield name, date_str, stats
+
+    def get(self, platform: str, date_str: str) -> Optional[dict]:
+        return self.load().get("partitions", {}).get(platform, {}).get(date_str)
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-platform totals, answered without opening any order files"""
+        summary = {}
+        for platform, _, stats in self.partitions():
+            totals = summary.setdefault(platform, {
+                "partitions": 0, "order_count": 0, "bytes": 0,
+                "first_order_at": None, "last_order_at": None,
+                **{f"{field}_sum": 0.0 for field in SUM_FIELDS},
+            })
+            totals["partitions"] += 1
+            totals["order_count"] += stats["order_count"]
+            totals["bytes"] += stats["bytes"]
+            for field in SUM_FIELDS:
+                totals[f"{field}_sum"] += stats[f"{field}_sum"]
+            if stats["first_order_at"] and (totals["first_order_at"] is None or stats["first_order_at"] < totals["first_order_at"]):
+                totals["first_order_at"] = stats["first_order_at"]
+            if stats["last_order_at"] and (totals["last_order_at"] is None or stats["last_order_at"] > totals["last_order_at"]):
+                totals["last_order_at"] = stats["last_order_at"]
+        return summary
+
+    def snapshot(self) -> Dict[str, str]:
+        """Content hash of every partition, keyed by "platform/date" """
+        return {f"{platform}/{date_str}": stats["sha256"] for platform, date_str, stats in self.partitions()}
+
+    def changed_since(self, snapshot: Dict[str, str]) -> List[str]:
+        """Partitions added or rewritten with different content since `snapshot` was taken"""
+        return [key for key, digest in self.snapshot().items() if snapshot.get(key) != digest]
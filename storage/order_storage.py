@@ -1,21 +1,103 @@
 import json
 import os
-from datetime import datetime
-from typing import List
-from models.order import StandardizedOrder
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .archive import MonthlyArchive, archived_days
+from .files import atomic_write
+from .fingerprints import FingerprintIndex
+from .manifest import MANIFEST_FILE, StorageManifest, partition_stats
+
+if TYPE_CHECKING:
+    # Type hints only: importing the models pulls in pydantic, which storage readers don't need
+    from models.order import StandardizedOrder
+
+DateLike = Union[date, datetime, str, None]
+
+# Day partition files; anything else in a platform directory (archives, temp files) is not a partition
+DAY_FILE = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+def _date_key(value: DateLike) -> Optional[str]:
+    """Normalize a date bound to the YYYY-MM-DD form used in partition names"""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+def storage_roots(base_path: str) -> List[str]:
+    """
+    Every storage under `base_path`: the path itself, and each account partition
+    below it (ACCOUNTS_CONFIG stores accounts in STORAGE_PATH/<partition>/), i.e.
+    every directory holding a storage manifest
+    """
+    roots = [base_path] if os.path.exists(os.path.join(base_path, MANIFEST_FILE)) else []
+    if os.path.isdir(base_path):
+        for name in sorted(os.listdir(base_path)):
+            path = os.path.join(base_path, name)
+            if not name.startswith('.') and os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+                roots.append(path)
+    return roots or [base_path]
+
+def _project(record: dict, fields: Iterable[str]) -> Dict[str, Any]:
+    """Pick (dotted) fields from a stored order, e.g. customer.country"""
+    projected = {}
+    for field in fields:
+        value = record
+        for part in field.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        projected[field] = value
+    return projected
 
 class OrderStorage:
-    def __init__(self, base_path: str):
+    def __init__(self, base_path: str, cache_size: int = 0, track_changes: bool = False):
+        """
+        cache_size: number of recently queried partitions kept parsed in memory (0 disables)
+        track_changes: skip unchanged orders on save and keep a change log (see FingerprintIndex)
+        """
         self.base_path = base_path
         os.makedirs(base_path, exist_ok=True)
+        self.manifest = StorageManifest(base_path)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, List[dict]]]" = OrderedDict()
+        self._archives: Dict[Tuple[str, str], Tuple[int, MonthlyArchive]] = {}
+        self._cache_lock = threading.Lock()
+        self.fingerprints = FingerprintIndex(base_path) if track_changes else None
+        self._accounts: Dict[str, 'OrderStorage'] = {}
+
+    def accounts(self) -> List['OrderStorage']:
+        """Storages of the account partitions below this one (see storage_roots)"""
+        accounts = []
+        for root in storage_roots(self.base_path):
+            if root == self.base_path:
+                continue
+            with self._cache_lock:
+                if root not in self._accounts:
+                    self._accounts[root] = OrderStorage(root, cache_size=self.cache_size)
+                accounts.append(self._accounts[root])
+        return accounts
 
-    def save_orders(self, orders: List[StandardizedOrder], platform: str):
+    def save_orders(self, orders: List['StandardizedOrder'], platform: str, merge: bool = False):
         """
-        Save orders to a JSON file organized by date and platform
+        Save orders to a JSON file organized by date and platform.
+
+        Each day file is replaced with the given orders of that day, unless `merge`
+        is set, e.g. for a partial crawl, in which case they are upserted into it.
+        With change tracking enabled, orders whose raw data is unchanged since the last
+        save are skipped, and the rest are always merged into the existing day files.
         """
         if not orders:
             return
 
+        changes = None
+        if self.fingerprints is not None:
+            changes = self.fingerprints.diff(platform, {order.order_id: order.raw_data for order in orders})
+            orders = [order for order in orders if order.order_id in changes]
+            if not orders:
+                return
+
         # Group orders by date
         orders_by_date = {}
         for order in orders:
@@ -24,19 +106,203 @@ class OrderStorage:
                 orders_by_date[date_str] = []
             orders_by_date[date_str].append(order)
 
-        # Save orders for each date
-        for date_str, date_orders in orders_by_date.items():
-            # Create platform-specific directory
+        # Save orders for each date; under the manifest lock, so another writer of the same
+        # partition can't replace the file between our write and our manifest update
+        with self.manifest.locked():
+            manifest_updates = {}
+            for date_str, date_orders in orders_by_date.items():
+                # Convert orders to JSON-serializable format
+                orders_data = [order.model_dump() for order in date_orders]
+                if merge or changes is not None:
+                    orders_data = self._merge_partition(platform, date_str, orders_data)
+
+                manifest_updates[(platform, date_str)] = self._write_partition(platform, date_str, orders_data)
+
+            self.manifest.update_many(manifest_updates)
+
+        if changes is not None:
+            details = {
+                order.order_id: {
+                    "date": order.order_date.strftime("%Y-%m-%d"),
+                    "status": order.status,
+                    "tracking_number": order.tracking_number,
+                }
+                for order in orders
+            }
+            self.fingerprints.commit(platform, changes, details)
+
+    def _write_partition(self, platform: str, date_str: str, orders_data: List[dict]) -> dict:
+        """Write one day file and return its manifest statistics"""
+        # Create platform-specific directory
+        platform_dir = os.path.join(self.base_path, platform)
+        os.makedirs(platform_dir, exist_ok=True)
+
+        # Create filename with date
+        filepath = os.path.join(platform_dir, f"{date_str}.json")
+
+        # Replace the file atomically so a crash never leaves a truncated day file
+        content = json.dumps(orders_data, indent=2, default=str).encode()
+        atomic_write(filepath, content)
+        return partition_stats(orders_data, content)
+
+    def replace_partition(self, platform: str, date_str: str, orders_data: List[dict]):
+        """Overwrite one day partition with the given records, e.g. after re-converting them"""
+        with self.manifest.locked():
+            self.manifest.update(platform, date_str, self._write_partition(platform, date_str, orders_data))
+
+    def _merge_partition(self, platform: str, date_str: str, orders_data: List[dict]) -> List[dict]:
+        """Upsert orders into the stored day partition, keyed by order_id"""
+        content = self.read_partition_bytes(platform, date_str)
+        if content is None:
+            return orders_data
+
+        merged = json.loads(content)
+        positions = {record.get("order_id"): index for index, record in enumerate(merged)}
+        for record in orders_data:
+            index = positions.get(record["order_id"])
+            if index is None:
+                positions[record["order_id"]] = len(merged)
+                merged.append(record)
+            else:
+                merged[index] = record
+        return merged
+
+    def changes(self, after_seq: int = 0, platform: Optional[str] = None) -> Iterator[dict]:
+        """New or changed orders recorded after `after_seq`, when change tracking is enabled"""
+        if self.fingerprints is None:
+            raise ValueError("Change tracking is not enabled for this storage")
+        return self.fingerprints.read_changes(after_seq, platform)
+
+    def rebuild_manifest(self):
+        """
+        Index every partition on disk, e.g. files written before the manifest existed
+        """
+        manifest_updates = {}
+        for platform, date_str in self.partitions():
+            content = self.read_partition_bytes(platform, date_str)
+            records = json.loads(content)
+            if isinstance(records, list):
+                stats = partition_stats(records, content)
+                if not os.path.exists(os.path.join(self.base_path, platform, f"{date_str}.json")):
+                    stats["tier"] = "archive"
+                manifest_updates[(platform, date_str)] = stats
+
+        self.manifest.update_many(manifest_updates)
+        return len(manifest_updates)
+
+    def platforms(self) -> List[str]:
+        """Platform directories of this storage; account partitions below it are not platforms"""
+        return sorted(
+            name for name in os.listdir(self.base_path)
+            if os.path.isdir(os.path.join(self.base_path, name)) and not name.startswith('.')
+            and not os.path.exists(os.path.join(self.base_path, name, MANIFEST_FILE))
+        )
+
+    def partitions(self, platforms: Optional[Iterable[str]] = None,
+                   start: DateLike = None, end: DateLike = None) -> List[Tuple[str, str]]:
+        """
+        (platform, date) of the day partitions within [start, end], read from the
+        partition layout (day files plus monthly archive indexes) of each platform.
+        All platforms when `platforms` is None; account partitions are not included.
+        """
+        start_key, end_key = _date_key(start), _date_key(end)
+        partitions = []
+        for platform in (self.platforms() if platforms is None else platforms):
             platform_dir = os.path.join(self.base_path, platform)
-            os.makedirs(platform_dir, exist_ok=True)
+            if not os.path.isdir(platform_dir):
+                continue
+            dates = set(archived_days(platform_dir))
+            dates.update(filename[:-len('.json')] for filename in os.listdir(platform_dir) if DAY_FILE.match(filename))
+            for date_str in sorted(dates):
+                if (start_key and date_str < start_key) or (end_key and date_str > end_key):
+                    continue
+                partitions.append((platform, date_str))
+        return partitions
+
+    def _archive(self, platform: str, month: str) -> Optional[MonthlyArchive]:
+        """Monthly archive of a platform, reloaded when its index is replaced"""
+        archive = MonthlyArchive(os.path.join(self.base_path, platform), month)
+        try:
+            index_mtime = os.stat(archive.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._cache_lock:
+            cached = self._archives.get((platform, month))
+            if cached and cached[0] == index_mtime:
+                return cached[1]
+            self._archives[(platform, month)] = (index_mtime, archive)
+        return archive
+
+    def read_partition_bytes(self, platform: str, date_str: str) -> Optional[bytes]:
+        """
+        Stored content of a partition: its day file, or its block of the monthly
+        archive once compacted. None if the partition does not exist.
+        """
+        try:
+            with open(os.path.join(self.base_path, platform, f"{date_str}.json"), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            archive = self._archive(platform, date_str[:7])
+            return archive.read_day_bytes(date_str) if archive else None
+
+    def partition_version(self, platform: str, date_str: str) -> str:
+        """Cheap version string of a partition that changes whenever its content does"""
+        try:
+            stat = os.stat(os.path.join(self.base_path, platform, f"{date_str}.json"))
+            return f"file:{stat.st_mtime_ns}:{stat.st_size}"
+        except FileNotFoundError:
+            archive = self._archive(platform, date_str[:7])
+            entry = archive.index["days"].get(date_str) if archive else None
+            if entry is None:
+                raise
+            return entry["sha256"]
+
+    def read_partition(self, platform: str, date_str: str) -> List[dict]:
+        """
+        Stored orders of one partition, from either storage tier. Served from the LRU
+        cache while unchanged; cached records are shared, so treat them as read-only.
+        """
+        if not self.cache_size:
+            return self._load_partition(platform, date_str)
+
+        key = (platform, date_str)
+        version = self.partition_version(platform, date_str)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == version:
+                self._cache.move_to_end(key)
+                return cached[1]
 
-            # Create filename with date
-            filename = f"{date_str}.json"
-            filepath = os.path.join(platform_dir, filename)
+        records = self._load_partition(platform, date_str)
+        with self._cache_lock:
+            self._cache[key] = (version, records)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return records
 
-            # Convert orders to JSON-serializable format
-            orders_data = [order.model_dump() for order in date_orders]
+    def _load_partition(self, platform: str, date_str: str) -> List[dict]:
+        content = self.read_partition_bytes(platform, date_str)
+        if content is None:
+            raise FileNotFoundError(f"No {platform} partition for {date_str} in {self.base_path}")
+        return json.loads(content)
 
-            # Save to file
-            with open(filepath, 'w') as f:
-                json.dump(orders_data, f, indent=2, default=str) 
\ No newline at end of file
+    def query(self, platforms: Optional[Iterable[str]] = None, start: DateLike = None, end: DateLike = None,
+              fields: Optional[Iterable[str]] = None,
+              where: Optional[Callable[[dict], bool]] = None) -> Iterator[dict]:
+        """
+        Stream stored orders whose partition date is within [start, end] (inclusive).
+
+        Only the matching day partitions are opened. `where` filters stored order
+        dicts; `fields` projects each match to the given (dotted) fields. Orders of
+        the account partitions below this storage are included, after its own.
+        """
+        platforms = list(platforms) if platforms is not None else None
+        fields = list(fields) if fields else None
+        for platform, date_str in self.partitions(platforms, start, end):
+            for record in self.read_partition(platform, date_str):
+                if where is not None and not where(record):
+                    continue
+                yield _project(record, fields) if fields else record
+        for account in self.accounts():
+            yield from account.query(platforms, start, end, fields, where)
@@ -0,0 +1,107 @@
+"""
+Background writer that takes order serialization off the crawl threads.
+"""
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from .order_storage import OrderStorage
+
+if TYPE_CHECKING:
+    from models.order import StandardizedOrder
+
+logger = logging.getLogger("pod_crawler.storage")
+
+_STOP = object()
+
+
+class AsyncOrderWriter:
+    """
+    Saves order batches on a background thread.
+
+    Batches are accepted through a bounded queue, so `submit` blocks (back-pressure)
+    when the writer falls behind. Whatever is queued when the writer wakes up is
+    coalesced into one `save_orders` call per storage, platform and merge mode,
+    i.e. one write per day partition. Write errors are raised from `flush()` / `close()`.
+    """
+
+    def __init__(self, max_pending: int = 16):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._errors: List[Exception] = []
+        self._errors_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="order-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, storage: OrderStorage, orders: List['StandardizedOrder'], platform: str, merge: bool = False):
+        """Queue orders for saving (see OrderStorage.save_orders); blocks while the queue is full"""
+        if self._closed:
+            raise RuntimeError("AsyncOrderWriter is closed")
+        if orders:
+            self._queue.put((storage, platform, list(orders), merge))
+
+    def flush(self):
+        """Wait until every submitted batch is on disk"""
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        """Flush pending batches and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_errors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            # Don't hide the exception that is already propagating
+            if exc_type is None:
+                raise
+
+    def _raise_errors(self):
+        with self._errors_lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Coalesce everything that queued up while the previous write ran
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            self._write([item for item in batch if item is not _STOP])
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Tuple[OrderStorage, str, List['StandardizedOrder'], bool]]):
+        grouped: Dict[Tuple[str, str, bool], Tuple[OrderStorage, List['StandardizedOrder']]] = {}
+        for storage, platform, orders, merge in batch:
+            key = (storage.base_path, platform, merge)
+            if key in grouped:
+                grouped[key][1].extend(orders)
+            else:
+                grouped[key] = (storage, list(orders))
+
+        for (base_path, platform, merge), (storage, orders) in grouped.items():
+            try:
+                storage.save_orders(orders, platform, merge=merge)
+                logger.debug("Wrote %s %s orders to %s", len(orders), platform, base_path)
+            except Exception as e:
+                logger.error("Error writing %s orders to %s: %s", platform, base_path, e, exc_info=True)
+                with self._errors_lock:
+                    self._errors.append(e)
@@ -0,0 +1,44 @@
+"""
+Shared fixtures: stored orders and the multi-account storage layout.
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+from models.order import Customer, OrderItem, StandardizedOrder
+from storage.order_storage import OrderStorage
+
+
+def _make_order(order_id: str, day: str, price: float = 10.0, platform: str = "printify") -> StandardizedOrder:
+    return StandardizedOrder(
+        platform=platform,
+        order_id=order_id,
+        order_date=datetime.fromisoformat(f"{day}T12:00:00"),
+        customer=Customer(),
+        items=[OrderItem(product_name="Tee", quantity=1, price=price)],
+        subtotal=price,
+        shipping_cost=0.0,
+        total_cost=price,
+        final_price=price,
+        status="fulfilled",
+        raw_data={"id": order_id, "day": day},
+    )
+
+
+@pytest.fixture
+def make_order():
+    """make_order(order_id, "YYYY-MM-DD", price=10.0, platform="printify") -> StandardizedOrder"""
+    return _make_order
+
+
+@pytest.fixture
+def accounts_store(tmp_path):
+    """A STORAGE_PATH holding one order of its own and two account partitions"""
+    base = str(tmp_path)
+    OrderStorage(base).save_orders([_make_order("base-1", "2025-03-01")], "printify")
+    OrderStorage(os.path.join(base, "printify-us"), track_changes=True).save_orders(
+        [_make_order("us-1", "2025-03-01"), _make_order("us-2", "2025-03-02")], "printify")
+    OrderStorage(os.path.join(base, "printful-eu")).save_orders(
+        [_make_order("eu-1", "2025-03-02", platform="printful")], "printful")
+    return base
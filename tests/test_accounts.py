@@ -0,0 +1,33 @@
+"""
+Account configuration for multi-store crawling.
+"""
+import json
+
+import pytest
+
+from jobs.accounts import Account, fair_order, load_accounts
+
+
+def test_load_accounts(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHOP_TOKEN", "secret")
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps({"accounts": [
+        {"name": "us", "platform": "printify", "token": "env:SHOP_TOKEN", "shop_ids": ["1"]},
+        {"name": "eu", "platform": "printful", "token": "t2", "partition": "europe"},
+    ]}))
+    us, eu = load_accounts(str(path))
+    assert (us.token, us.partition) == ("secret", "us")
+    assert eu.partition == "europe"
+
+
+def test_unknown_platform_is_rejected(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps([{"name": "x", "platform": "gelato", "token": "t"}]))
+    with pytest.raises(ValueError):
+        load_accounts(str(path))
+
+
+def test_fair_order_interleaves_tokens():
+    accounts = [Account(name=f"a{i}", platform="printify", token="a") for i in range(3)] + \
+               [Account(name="b0", platform="printful", token="b")]
+    assert [account.name for account in fair_order(accounts)] == ["a0", "b0", "a1", "a2"]
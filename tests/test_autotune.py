@@ -0,0 +1,112 @@
+"""
+Autotuner decisions, on their own and fed by the paginated fetch of a crawler.
+"""
+import json
+import os
+
+import pytest
+import requests
+
+from crawlers.autotune import Autotuner
+from crawlers.printful import PrintfulCrawler
+
+
+@pytest.fixture
+def tuner(tmp_path):
+    return Autotuner("printful", str(tmp_path / "autotune.json"), 100, (20, 100), (1, 4))
+
+
+def _state(tuner):
+    return next(iter(tuner._states.values()))
+
+
+def _run(tuner, orders_per_second, throttled=False, errors=0, requests_sent=4):
+    episode = tuner.start()
+    for request in range(requests_sent):
+        tuner.observe(episode, throttled=throttled and request == 0, error=request < errors)
+    tuner.finish(episode, orders_per_second, 4, 1.0)
+    return episode.settings
+
+
+def test_climbs_while_throughput_improves(tuner):
+    assert _run(tuner, 100) == (100, 1)
+    assert _run(tuner, 200) == (100, 2)
+    assert _run(tuner, 300) == (100, 3)
+    assert tuner.start().settings == (100, 4)
+
+
+def test_throttled_level_is_not_retried(tuner):
+    for throughput in (100, 200, 300):
+        _run(tuner, throughput)
+    _run(tuner, 50, throttled=True)
+    assert _state(tuner)["ceiling"] == 3
+    for throughput in range(400, 1000, 100):
+        _run(tuner, throughput)
+        assert tuner.start().settings[1] <= 3
+
+
+def test_failing_episode_backs_off(tuner):
+    for throughput in (100, 200, 300):
+        _run(tuner, throughput)
+    _run(tuner, 0, errors=2)
+    assert tuner.start().settings[1] == 2
+    # One error in ten requests is not failing
+    _run(tuner, 100, errors=1, requests_sent=10)
+    assert _state(tuner)["best"] == 100
+
+
+def test_concurrent_episodes_are_judged_separately(tuner):
+    for throughput in (100, 200):
+        _run(tuner, throughput)
+    throttled, clean = tuner.start(), tuner.start()
+    tuner.observe(throttled, throttled=True)
+    tuner.observe(clean)
+    tuner.finish(clean, 1000, 4, 1.0)
+    assert _state(tuner)["ceiling"] is None
+    tuner.finish(throttled, 10, 4, 1.0)
+    assert _state(tuner)["ceiling"] == 2
+
+
+class _FakePrintful(PrintfulCrawler):
+    """Printful crawler whose listing has 4 pages of 100 orders, `failing` of them answering 503"""
+
+    def __init__(self, failing=()):
+        super().__init__("test")
+        self.failing = set(failing)
+
+    def _get(self, url, **kwargs):
+        offset = kwargs["params"]["offset"]
+        response = requests.Response()
+        response.url = url
+        if offset // 100 in self.failing:
+            response.status_code = 503
+            response._content = b"{}"
+        else:
+            response.status_code = 200
+            response._content = json.dumps({
+                "result": [{"id": offset + i} for i in range(100)],
+                "paging": {"total": 400, "offset": offset, "limit": 100},
+            }).encode()
+        return response
+
+
+def test_failed_fetch_backs_off_and_is_saved(tuner):
+    for throughput in (100, 200, 300):
+        _run(tuner, throughput)
+    crawler = _FakePrintful(failing=(1, 2, 3))
+    crawler.autotuner = tuner
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        crawler._get_all_pages("https://api.printful.com/orders", {})
+
+    assert tuner.start().settings == (100, 2)
+    with open(tuner.path) as f:
+        assert json.load(f)["printful"][next(iter(tuner._states))]["concurrency"] == 2
+
+
+def test_successful_fetch_is_an_episode(tuner):
+    crawler = _FakePrintful()
+    crawler.autotuner = tuner
+    assert len(crawler._get_all_pages("https://api.printful.com/orders", {})) == 400
+    assert _state(tuner)["episodes"] == 1
+    assert os.path.exists(tuner.path)
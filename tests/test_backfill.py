@@ -0,0 +1,37 @@
+"""
+Resumable backfill: chunking and per-chunk progress.
+"""
+from datetime import datetime
+
+from jobs import crawl_orders
+from jobs.accounts import Account
+from jobs.backfill import BackfillProgress, run_backfill, split_range
+
+
+def test_chunks_are_whole_days():
+    chunks = split_range(datetime(2025, 1, 1, 15), datetime(2025, 1, 10, 3), 4)
+    assert [(start.strftime("%m-%d %H"), end.strftime("%m-%d %H:%M")) for start, end in chunks] == [
+        ("01-01 00", "01-04 23:59"), ("01-05 00", "01-08 23:59"), ("01-09 00", "01-10 23:59")]
+
+
+def test_failed_chunks_are_retried_on_the_next_run(tmp_path, monkeypatch):
+    accounts = [Account(name="a", platform="printful", token="t"), Account(name="b", platform="printful", token="u")]
+    crawled = []
+
+    def crawl_account(account, storage_path, start, end):
+        crawled.append((account.name, start.day))
+        if account.name == "b" and start.day == 3:
+            raise RuntimeError("503 from the API")
+        return 1
+
+    monkeypatch.setattr(crawl_orders, "crawl_account", crawl_account)
+    progress = BackfillProgress(str(tmp_path / "progress.json"))
+    assert not run_backfill(accounts, str(tmp_path), datetime(2025, 1, 1), datetime(2025, 1, 4), 2, 2, progress)
+    assert len(crawled) == 4
+    assert progress.chunks["b|2025-01-03"]["status"] == "failed"
+
+    crawled.clear()
+    monkeypatch.setattr(crawl_orders, "crawl_account", lambda account, *args: crawled.append(account.name) or 1)
+    progress = BackfillProgress(str(tmp_path / "progress.json"))
+    assert run_backfill(accounts, str(tmp_path), datetime(2025, 1, 1), datetime(2025, 1, 4), 2, 2, progress)
+    assert crawled == ["b"]
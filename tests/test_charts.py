@@ -0,0 +1,33 @@
+"""
+Charts are only redrawn when their data changed.
+"""
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("matplotlib")
+
+from generate_cost_report import create_cost_plots  # noqa: E402
+
+
+def _costs(printful: float) -> "pd.DataFrame":
+    return pd.DataFrame([
+        {"date": "2025-03-01", "printful_cost": printful, "printify_cost": 5.0, "burger_cost": 1.0,
+         "total": printful + 6.0},
+        {"date": "2025-03-02", "printful_cost": 2.0, "printify_cost": 3.0, "burger_cost": 0.0, "total": 5.0},
+    ])
+
+
+def test_unchanged_charts_are_skipped(tmp_path, capsys):
+    output_dir = str(tmp_path)
+    create_cost_plots(_costs(10.0), output_dir, fmt="svg", jobs=1)
+    assert sorted(name for name in os.listdir(output_dir) if name.endswith(".svg")) == [
+        "daily_costs_by_platform.svg", "platform_cost_distribution.svg", "total_cost_trend.svg"]
+    capsys.readouterr()
+
+    create_cost_plots(_costs(10.0), output_dir, fmt="svg", jobs=1)
+    assert "up to date" in capsys.readouterr().out
+
+    create_cost_plots(_costs(12.0), output_dir, fmt="svg", jobs=1)
+    assert capsys.readouterr().out.count("Skipping") == 0
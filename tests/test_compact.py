@@ -0,0 +1,58 @@
+"""
+Compaction of old day files into monthly archives.
+"""
+import os
+from contextlib import contextmanager
+
+from jobs.compact import compact_storage
+from storage.archive import MonthlyArchive, compact_platform
+from storage.order_storage import OrderStorage
+
+
+def test_compacts_every_account_partition(accounts_store):
+    storage = OrderStorage(accounts_store)
+    assert compact_storage(storage, 30) == 4
+
+    assert not os.path.exists(os.path.join(accounts_store, "printify-us", "printify", "2025-03-01.json"))
+    account = OrderStorage(os.path.join(accounts_store, "printify-us"))
+    assert account.manifest.get("printify", "2025-03-01")["tier"] == "archive"
+    # Archived orders are still read, from every partition
+    assert sorted(order["order_id"] for order in storage.query()) == ["base-1", "eu-1", "us-1", "us-2"]
+
+
+def test_recent_days_are_kept(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01")], "printify")
+    assert compact_storage(storage, 100000) == 0
+    assert os.path.exists(tmp_path / "printify" / "2025-03-01.json")
+
+
+def test_day_rewritten_during_compaction_is_kept(tmp_path, make_order, monkeypatch):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01")], "printify")
+    write = MonthlyArchive.write
+
+    def write_then_save(archive, days):
+        write(archive, days)
+        storage.save_orders([make_order("o1", "2025-03-01"), make_order("o2", "2025-03-01")], "printify")
+
+    monkeypatch.setattr(MonthlyArchive, "write", write_then_save)
+    assert compact_storage(storage, 30) == 0
+    assert sorted(order["order_id"] for order in storage.query()) == ["o1", "o2"]
+    assert "tier" not in storage.manifest.get("printify", "2025-03-01")
+
+
+def test_delete_holds_the_lock(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01")], "printify")
+    platform_dir = str(tmp_path / "printify")
+    seen = []
+
+    @contextmanager
+    def locked():
+        seen.append(os.path.exists(os.path.join(platform_dir, "2025-03-01.json")))
+        yield
+        seen.append(os.path.exists(os.path.join(platform_dir, "2025-03-01.json")))
+
+    assert compact_platform(platform_dir, "2025-04-01", locked) == ["2025-03-01"]
+    assert seen == [True, False]
@@ -0,0 +1,88 @@
+"""
+Time budgets: deadlines, latency percentiles and crawls cut short by their budget.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+import requests
+
+from crawlers.deadline import Deadline, DeadlineExceeded, LatencyTracker
+from crawlers.printful import PrintfulCrawler
+from jobs import crawl_orders
+from jobs.accounts import Account
+from jobs.crawl_orders import PartialCrawl, crawl_account, platform_deadlines
+from storage.order_storage import OrderStorage
+
+
+def test_deadline_narrows_and_caps_timeouts():
+    run = Deadline.after(60)
+    assert run.within(None, "printful") is run
+    assert run.within(120, "printful") is run
+    platform = run.within(5, "printful")
+    assert platform.name == "printful" and platform.timeout(30) <= 5
+    assert Deadline().timeout(30) == 30
+    with pytest.raises(DeadlineExceeded):
+        Deadline(time.monotonic() - 1).timeout(30)
+
+
+def test_platform_budgets_from_env(monkeypatch):
+    monkeypatch.setenv("PLATFORM_BUDGET_SECONDS", "printful=10, burger_prints=20")
+    deadlines = platform_deadlines({"printful", "printify"}, Deadline())
+    assert deadlines["printify"].expires_at is None
+    assert 0 < deadlines["printful"].remaining() <= 10
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker()
+    for sample in range(19):
+        tracker.add(sample / 100)
+    assert tracker.percentile(0.95) is None
+    tracker.add(0.19)
+    assert tracker.percentile(0.95) == 0.19
+
+
+class _SlowPrintful(PrintfulCrawler):
+    """Printful listing of 4 pages of 2 orders on 2025-03-01; the budget runs out at the last page"""
+
+    def _get(self, url, **kwargs):
+        offset = kwargs["params"]["offset"]
+        if offset >= 6:
+            raise DeadlineExceeded("printful time budget exhausted")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({
+            "result": [{"id": f"p{offset + i}", "created": datetime(2025, 3, 1, 12).timestamp()} for i in range(2)],
+            "paging": {"total": 8, "offset": offset, "limit": 2},
+        }).encode()
+        return response
+
+
+@pytest.fixture
+def crawl_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("METADATA_CACHE", str(tmp_path / "metadata_cache.db"))
+    monkeypatch.setenv("AUTOTUNE", "false")
+    monkeypatch.setattr(PrintfulCrawler, "default_page_size", 2)
+    monkeypatch.setattr(crawl_orders, "build_crawler", lambda account: _SlowPrintful(account.token))
+    return str(tmp_path / "orders")
+
+
+def test_truncated_listing_returns_fetched_pages(crawl_env):
+    crawler = _SlowPrintful("test")
+    orders = crawler._get_all_pages("https://api.printful.com/orders", {})
+    assert crawler.truncated
+    assert [order["id"] for order in orders] == ["p0", "p1", "p2", "p3", "p4", "p5"]
+
+
+def test_partial_crawl_is_merged_into_stored_days(crawl_env, make_order):
+    account = Account(name="eu", platform="printful", token="t", partition="eu")
+    storage = OrderStorage(os.path.join(crawl_env, "eu"))
+    storage.save_orders([make_order("p7", "2025-03-01", platform="printful")], "printful")
+
+    with pytest.raises(PartialCrawl) as raised:
+        crawl_account(account, crawl_env, datetime(2025, 3, 1), datetime(2025, 3, 2))
+    assert raised.value.saved == 6
+    # The order stored before, on the page that wasn't fetched, is kept
+    assert sorted(order["order_id"] for order in storage.query()) == ["p0", "p1", "p2", "p3", "p4", "p5", "p7"]
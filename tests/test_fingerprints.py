@@ -0,0 +1,29 @@
+"""
+Change tracking: unchanged orders are skipped, changes are logged.
+"""
+from storage.order_storage import OrderStorage
+
+
+def test_unchanged_orders_are_not_written_again(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path), track_changes=True)
+    storage.save_orders([make_order("o1", "2025-03-01"), make_order("o2", "2025-03-01")], "printify")
+    version = storage.partition_version("printify", "2025-03-01")
+
+    storage.save_orders([make_order("o1", "2025-03-01")], "printify")
+    assert storage.partition_version("printify", "2025-03-01") == version
+    assert [change["kind"] for change in storage.changes()] == ["new", "new"]
+
+
+def test_changed_orders_are_merged_and_logged(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path), track_changes=True)
+    storage.save_orders([make_order("o1", "2025-03-01"), make_order("o2", "2025-03-01")], "printify")
+    last_seq = storage.fingerprints.last_seq()
+
+    changed = make_order("o1", "2025-03-01", price=12.0)
+    changed.raw_data["status"] = "shipped"
+    storage.save_orders([changed], "printify")
+
+    assert [(change["order_id"], change["kind"]) for change in storage.changes(after_seq=last_seq)] == \
+        [("o1", "changed")]
+    stored = {order["order_id"]: order["final_price"] for order in storage.query()}
+    assert stored == {"o1": 12.0, "o2": 10.0}
@@ -0,0 +1,43 @@
+"""
+Item cost cube: incremental sync, account partitions and torn saves.
+"""
+import os
+
+from storage.cube import CUBE_DATA_FILE, ItemCostCube
+from storage.order_storage import OrderStorage
+
+
+def test_sync_only_rereads_changed_partitions(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01", 10), make_order("o2", "2025-03-02", 5)], "printify")
+    cube = ItemCostCube(storage)
+    assert cube.sync() == 2
+    assert cube.sync() == 0
+
+    storage.save_orders([make_order("o3", "2025-03-02", 7)], "printify")
+    assert ItemCostCube(storage).sync() == 1
+    assert ItemCostCube(storage).top_products() == [{"product": "Tee", "count": 2, "quantity": 2, "cost": 17.0}]
+
+
+def test_accounts_are_added_up(accounts_store):
+    cube = ItemCostCube(OrderStorage(accounts_store))
+    assert cube.sync() == 4
+    assert cube.top_products() == [{"product": "Tee", "count": 4, "quantity": 4, "cost": 40.0}]
+    assert cube.provider_breakdown(platforms=["printful"]) == {"printful:": {"count": 1, "quantity": 1, "cost": 10.0}}
+    assert cube.group_by(("date",), start="2025-03-02") == {("2025-03-02",): {"count": 2, "quantity": 2, "cost": 20.0}}
+    # Each account keeps its own cube, so the next sync has nothing to do
+    assert os.path.exists(os.path.join(accounts_store, "printify-us", CUBE_DATA_FILE))
+    assert ItemCostCube(OrderStorage(accounts_store)).sync() == 0
+
+
+def test_torn_save_is_rebuilt(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01", 10)], "printify")
+    ItemCostCube(storage).sync()
+    with open(os.path.join(str(tmp_path), CUBE_DATA_FILE), 'ab') as f:
+        f.write(b"\0" * 8)
+
+    cube = ItemCostCube(storage)
+    assert cube.partitions == {}
+    assert cube.sync() == 1
+    assert cube.top_products()[0]["cost"] == 10.0
@@ -0,0 +1,32 @@
+"""
+Sampling of per-order log events and structured records.
+"""
+import json
+import logging
+
+from crawlers.base import ORDER_EVENT
+from jobs.logging_config import JsonFormatter, SamplingFilter
+
+
+def _record(message: str, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("pod_crawler.test", logging.INFO, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_only_order_events_are_sampled():
+    sampler = SamplingFilter(0.1)
+    kept = [sampler.filter(_record("order", **ORDER_EVENT)) for _ in range(100)]
+    assert sum(kept) == 10
+    assert all(sampler.filter(_record("summary")) for _ in range(5))
+
+
+def test_zero_rate_drops_order_events():
+    assert not SamplingFilter(0).filter(_record("order", **ORDER_EVENT))
+    assert SamplingFilter(1).filter(_record("order", **ORDER_EVENT))
+
+
+def test_json_records_carry_extra_fields():
+    entry = json.loads(JsonFormatter().format(_record("converted %s", event="convert.summary", converted=3)))
+    assert entry["event"] == "convert.summary" and entry["converted"] == 3
+    assert entry["logger"] == "pod_crawler.test" and "sampled" not in entry
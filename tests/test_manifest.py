@@ -0,0 +1,57 @@
+"""
+Storage manifest statistics and locking.
+"""
+import threading
+
+from storage.order_storage import OrderStorage
+
+
+def test_saves_record_partition_stats(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01", 10), make_order("o2", "2025-03-01", 5)], "printify")
+    stats = storage.manifest.get("printify", "2025-03-01")
+    assert stats["order_count"] == 2
+    assert stats["final_price_sum"] == 15.0
+    assert storage.manifest.summary()["printify"]["partitions"] == 1
+
+
+def test_rebuild_matches_saved_stats(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    storage.save_orders([make_order("o1", "2025-03-01"), make_order("o2", "2025-03-02")], "printify")
+    snapshot = storage.manifest.snapshot()
+    (tmp_path / "manifest.json").unlink()
+    assert storage.rebuild_manifest() == 2
+    assert storage.manifest.snapshot() == snapshot
+
+
+def test_lock_is_reentrant_and_exclusive(tmp_path):
+    manifest = OrderStorage(str(tmp_path)).manifest
+    entered = threading.Event()
+
+    def other_writer():
+        with manifest.locked():
+            entered.set()
+
+    with manifest.locked():
+        with manifest.locked():
+            thread = threading.Thread(target=other_writer)
+            thread.start()
+            assert not entered.wait(0.1)
+    thread.join(1)
+    assert entered.is_set()
+
+
+def test_concurrent_saves_keep_manifest_consistent(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+
+    def save(n):
+        storage.save_orders([make_order(f"o{n}-{i}", "2025-03-01") for i in range(n)], "printify")
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Whichever save won, the manifest describes the file on disk
+    assert storage.manifest.get("printify", "2025-03-01")["order_count"] == \
+        len(storage.read_partition("printify", "2025-03-01"))
@@ -0,0 +1,43 @@
+"""
+Persistent metadata cache and currency rates.
+"""
+import json
+import time
+
+from crawlers.metadata import CurrencyRates, MetadataCache
+
+
+def test_values_persist_across_processes_until_they_expire(tmp_path):
+    path = str(tmp_path / "cache.db")
+    MetadataCache(path).set("shops", [1, 2], ttl=60)
+    MetadataCache(path).set("short", "x", ttl=0.01)
+    time.sleep(0.02)
+
+    cache = MetadataCache(path)
+    assert cache.get("shops") == [1, 2]
+    assert cache.get("short", "expired") == "expired"
+    assert cache.purge_expired() == 1
+
+
+def test_get_or_load_calls_the_loader_once(tmp_path):
+    cache = MetadataCache(str(tmp_path / "cache.db"))
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_load("shops", lambda: calls.append(1) or ["s1"], ttl=60) == ["s1"]
+    assert len(calls) == 1
+    cache.invalidate("shops")
+    assert cache.get("shops") is None
+
+
+def test_rates_use_the_closest_earlier_day(tmp_path):
+    rates_path = tmp_path / "rates.json"
+    rates_path.write_text(json.dumps({"EUR": {"2025-03-03": 1.08, "2025-03-07": 1.10}}))
+    rates = CurrencyRates(MetadataCache(str(tmp_path / "cache.db")), str(rates_path))
+    assert rates.rate("EUR", "2025-03-01") == 1.08
+    assert rates.rate("EUR", "2025-03-06") == 1.08
+    assert rates.rate("EUR", "2025-03-09") == 1.10
+
+
+def test_missing_rates_file_uses_the_fallback(tmp_path):
+    rates = CurrencyRates(MetadataCache(str(tmp_path / "cache.db")), str(tmp_path / "missing.json"))
+    assert rates.rate("EUR", "2025-03-01") == 1.08
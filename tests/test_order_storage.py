@@ -0,0 +1,44 @@
+"""
+OrderStorage partition listing and queries, on a single storage and on the
+multi-account layout of ACCOUNTS_CONFIG (STORAGE_PATH/<partition>/<platform>/...).
+"""
+import os
+
+from storage.order_storage import OrderStorage, storage_roots
+
+
+def test_storage_roots(accounts_store):
+    assert storage_roots(accounts_store) == [
+        accounts_store, os.path.join(accounts_store, "printful-eu"), os.path.join(accounts_store, "printify-us")]
+
+
+def test_account_partitions_are_not_platforms(accounts_store):
+    storage = OrderStorage(accounts_store)
+    assert storage.platforms() == ["printify"]
+    assert storage.partitions() == [("printify", "2025-03-01")]
+
+
+def test_only_day_files_are_partitions(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path), track_changes=True)
+    storage.save_orders([make_order("o1", "2025-03-01")], "printify")
+    (tmp_path / "printify" / "notes.json").write_text("{}")
+    (tmp_path / "printify" / ".2025-03-02.json.abc.tmp").write_text("[")
+    assert storage.partitions() == [("printify", "2025-03-01")]
+
+
+def test_empty_platform_list_selects_nothing(accounts_store):
+    storage = OrderStorage(accounts_store)
+    assert storage.partitions([]) == []
+    assert list(storage.query([])) == []
+
+
+def test_query_includes_account_partitions(accounts_store):
+    storage = OrderStorage(accounts_store)
+    assert sorted(order["order_id"] for order in storage.query(["printify"])) == ["base-1", "us-1", "us-2"]
+    assert [order["order_id"] for order in storage.query(["printify"], start="2025-03-02")] == ["us-2"]
+    assert [order["order_id"] for order in storage.query(["printful"], fields=["order_id"])] == ["eu-1"]
+
+
+def test_account_storage_queries_only_itself(accounts_store):
+    storage = OrderStorage(os.path.join(accounts_store, "printify-us"))
+    assert sorted(order["order_id"] for order in storage.query()) == ["us-1", "us-2"]
@@ -0,0 +1,55 @@
+"""
+Recording raw API pages and replaying them without network.
+"""
+import json
+import os
+import subprocess
+import sys
+from datetime import timedelta
+
+import pytest
+import requests
+
+from crawlers.recording import PageRecorder, PageReplayer, ReplayExhausted, endpoint_name
+
+URL = "https://api.printify.com/v1/shops/1/orders.json"
+
+
+def _response(body: dict, status: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.elapsed = timedelta(seconds=0.25)
+    response._content = json.dumps(body).encode()
+    return response
+
+
+def test_endpoint_name():
+    assert endpoint_name(URL) == "v1_shops_1_orders.json"
+
+
+def test_pages_replay_in_recorded_order(tmp_path):
+    recorder = PageRecorder(str(tmp_path))
+    recorder.record("printify", URL, {"page": 1}, _response({"page": 1}))
+    recorder.record("printify", URL, {"page": 2}, _response({"error": "busy"}, 503))
+
+    replayer = PageReplayer(str(tmp_path))
+    assert replayer.get("printify", URL).json() == {"page": 1}
+    failed = replayer.get("printify", URL)
+    with pytest.raises(requests.HTTPError):
+        failed.raise_for_status()
+    with pytest.raises(ReplayExhausted):
+        replayer.get("printify", URL)
+
+
+def test_second_recorder_appends_instead_of_overwriting(tmp_path):
+    PageRecorder(str(tmp_path)).record("printify", URL, None, _response({"run": 1}))
+    PageRecorder(str(tmp_path)).record("printify", URL, None, _response({"run": 2}))
+    replayer = PageReplayer(str(tmp_path))
+    assert [replayer.get("printify", URL).json()["run"] for _ in range(2)] == [1, 2]
+
+
+def test_crawl_job_import_does_not_load_requests():
+    code = "import sys, jobs.crawl_orders; print('requests' in sys.modules)"
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,22 @@
+"""
+Lazily imported platform crawlers.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from crawlers.registry import get_crawler_class, registered_platforms
+
+
+def test_crawlers_are_imported_on_first_use():
+    code = "import sys, crawlers.registry; print('crawlers.printful' in sys.modules)"
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+    assert "printful" in registered_platforms()
+    assert get_crawler_class("printful").platform == "printful"
+    assert "crawlers.printful" in sys.modules
+    with pytest.raises(ValueError):
+        get_crawler_class("gelato")
@@ -0,0 +1,57 @@
+"""
+Report server: aggregates over every account partition and error responses.
+"""
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from report_server import ChartCache, CostAggregates, DailyIndex, ReportHandler
+
+
+@pytest.fixture
+def server(accounts_store):
+    aggregates = CostAggregates(accounts_store)
+    aggregates.refresh()
+    ReportHandler.aggregates = aggregates
+    ReportHandler.charts = ChartCache()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReportHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_summary_adds_up_account_partitions(server):
+    status, summary = _get(f"{server}/api/summary")
+    assert status == 200
+    assert (summary["total_days"], summary["total_cost"], summary["order_count"]) == (2, 40.0, 4)
+    assert summary["platforms"]["printify"]["cost"] == 30.0
+
+
+def test_bad_requests_are_answered(server):
+    assert _get(f"{server}/api/rolling?window=0")[0] == 400
+    assert _get(f"{server}/api/rolling?window=abc")[0] == 400
+    assert _get(f"{server}/api/nothing")[0] == 404
+    assert _get(f"{server}/charts/total_cost_trend.png?from=2030-01-01")[0] == 404
+
+
+def test_unexpected_errors_are_500(server, monkeypatch):
+    def broken(self, start=None, end=None):
+        raise KeyError("final_price_sum")
+
+    monkeypatch.setattr(DailyIndex, "summary", broken)
+    assert _get(f"{server}/api/summary") == (500, {"error": "Internal server error"})
+    # The server keeps serving
+    assert _get(f"{server}/api/status")[0] == 200
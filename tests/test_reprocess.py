@@ -0,0 +1,73 @@
+"""
+Reprocessing stored orders from their raw_data.
+"""
+import os
+
+import pytest
+
+from crawlers.printify import PrintifyCrawler
+from jobs import reprocess as reprocess_job
+from jobs.backfill import BackfillProgress
+from jobs.reprocess import reprocess, reprocess_partition
+from storage.order_storage import OrderStorage
+
+
+def _raw(order_id: str, status: str = "fulfilled") -> dict:
+    return {"id": order_id, "created_at": "2025-03-02T10:00:00+00:00", "status": status,
+            "line_items": [], "total_price": 1000}
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch, tmp_path):
+    monkeypatch.setenv("METADATA_CACHE", str(tmp_path / "metadata_cache.db"))
+    monkeypatch.setattr(reprocess_job, "_crawlers", {})
+
+
+def _store(path: str, *order_ids: str) -> OrderStorage:
+    """Storage holding the given Printify orders with a stale stored status"""
+    storage = OrderStorage(path)
+    crawler = PrintifyCrawler("test")
+    storage.save_orders([crawler._convert_to_standardized(_raw(order_id)) for order_id in order_ids], "printify")
+    records = storage.read_partition("printify", "2025-03-02")
+    for record in records:
+        record["status"] = "stale"
+    storage.replace_partition("printify", "2025-03-02", records)
+    return storage
+
+
+def test_reprocesses_every_account_partition(tmp_path):
+    base = str(tmp_path / "orders")
+    _store(os.path.join(base, "printify-us"), "us-1", "us-2")
+    _store(os.path.join(base, "printify-eu"), "eu-1")
+    progress = BackfillProgress(str(tmp_path / "progress.json"))
+
+    totals = reprocess(OrderStorage(base), progress, workers=1)
+    assert (totals["partitions"], totals["changed"], totals["failed"]) == (2, 3, 0)
+    assert {order["status"] for order in OrderStorage(base).query()} == {"fulfilled"}
+    assert progress.is_done("printify-us/printify/2025-03-02")
+    assert reprocess(OrderStorage(base), progress, workers=1)["partitions"] == 0
+
+
+def test_reprocessed_orders_are_logged_as_changes(tmp_path):
+    _store(str(tmp_path), "o1")
+    reprocess_partition(str(tmp_path), "printify", "2025-03-02", track_changes=True)
+    changes = list(OrderStorage(str(tmp_path), track_changes=True).changes())
+    assert [(change["order_id"], change["kind"], change["status"]) for change in changes] == \
+        [("o1", "reprocessed", "fulfilled")]
+
+
+def test_orders_saved_while_converting_are_kept(tmp_path, monkeypatch):
+    storage = _store(str(tmp_path), "o1")
+    convert = PrintifyCrawler._convert_to_standardized
+    saved = []
+
+    def convert_while_a_crawl_saves(crawler, raw):
+        if not saved:
+            saved.append(True)
+            storage.save_orders([convert(crawler, _raw("o2"))], "printify", merge=True)
+        return convert(crawler, raw)
+
+    monkeypatch.setattr(PrintifyCrawler, "_convert_to_standardized", convert_while_a_crawl_saves)
+    records, changed, failed, _ = reprocess_partition(str(tmp_path), "printify", "2025-03-02")
+    assert (records, changed, failed) == (2, 1, 0)
+    assert sorted(order["order_id"] for order in storage.query()) == ["o1", "o2"]
@@ -0,0 +1,64 @@
+"""
+Leases of the SQLite work queue.
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+from jobs.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    queue.enqueue([
+        ("shop-a", "printify", datetime(2025, 1, 1), datetime(2025, 1, 7)),
+        ("shop-a", "printify", datetime(2025, 1, 8), datetime(2025, 1, 14)),
+    ])
+    yield queue
+    queue.close()
+
+
+def test_planned_shards_are_not_enqueued_twice(queue):
+    assert queue.enqueue([("shop-a", "printify", datetime(2025, 1, 1), datetime(2025, 1, 7))]) == 0
+    assert queue.counts() == {"pending": 2}
+
+
+def test_leased_tasks_are_not_handed_out_again(queue):
+    first, second = queue.claim("w1", 60), queue.claim("w2", 60)
+    assert first["id"] != second["id"]
+    assert queue.claim("w3", 60) is None
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_loses_it(queue):
+    task = queue.claim("w1", 0.01)
+    queue.claim("w1", 60)
+    time.sleep(0.02)
+
+    reclaimed = queue.claim("w2", 60)
+    assert reclaimed["id"] == task["id"] and reclaimed["attempts"] == 2
+    assert not queue.renew(task["id"], "w1", 60)
+    # A late completion by the worker that lost the lease doesn't count
+    queue.complete(task["id"], "w1", 10)
+    assert queue.counts() == {"leased": 2}
+    queue.complete(task["id"], "w2", 10)
+    assert queue.counts() == {"leased": 1, "done": 1}
+
+
+def test_failed_tasks_are_retried_up_to_max_attempts(queue):
+    task = queue.claim("w1", 60)
+    queue.fail(task["id"], "w1", "boom")
+    assert queue.claim("w1", 60)["id"] == task["id"]
+    queue.fail(task["id"], "w1", "boom again")
+    assert queue.counts() == {"pending": 1, "failed": 1}
+
+
+def test_task_whose_lease_expired_too_often_fails(queue):
+    task = queue.claim("w1", 0.01)
+    queue.claim("w2", 60)
+    time.sleep(0.02)
+    assert queue.claim("w1", 0.01)["id"] == task["id"]
+    time.sleep(0.02)
+    assert queue.claim("w3", 60) is None
+    assert queue.counts() == {"leased": 1, "failed": 1}
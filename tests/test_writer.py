@@ -0,0 +1,60 @@
+"""
+Atomic file replacement and the background order writer.
+"""
+import os
+
+import pytest
+
+from storage import files
+from storage.files import atomic_write
+from storage.order_storage import OrderStorage
+from storage.writer import AsyncOrderWriter
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = str(tmp_path / "day.json")
+    atomic_write(path, b"old")
+    atomic_write(path, b"new")
+    assert open(path, 'rb').read() == b"new"
+    assert os.listdir(tmp_path) == ["day.json"]
+
+
+def test_failed_atomic_write_keeps_old_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "day.json")
+    atomic_write(path, b"old")
+
+    def crash(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(files.os, "fsync", crash)
+    with pytest.raises(OSError):
+        atomic_write(path, b"new")
+    assert open(path, 'rb').read() == b"old"
+    # No temp file is left behind
+    assert os.listdir(tmp_path) == ["day.json"]
+
+
+def test_writer_saves_and_merges_batches(tmp_path, make_order):
+    storage = OrderStorage(str(tmp_path))
+    with AsyncOrderWriter() as writer:
+        writer.submit(storage, [make_order("o1", "2025-03-01")], "printify")
+        writer.submit(storage, [make_order("o2", "2025-03-01")], "printify", merge=True)
+        writer.flush()
+        assert sorted(order["order_id"] for order in storage.query()) == ["o1", "o2"]
+    assert storage.manifest.get("printify", "2025-03-01")["order_count"] == 2
+
+
+def test_write_errors_are_raised_on_flush(tmp_path, make_order, monkeypatch):
+    storage = OrderStorage(str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(storage, "save_orders", fail)
+    writer = AsyncOrderWriter()
+    writer.submit(storage, [make_order("o1", "2025-03-01")], "printify")
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(storage, [make_order("o2", "2025-03-01")], "printify")